@@ -12,7 +12,7 @@ import json
 import logging
 from pathlib import Path
 from datetime import datetime, date
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from kiteconnect import KiteConnect
 from dotenv import load_dotenv
@@ -25,6 +25,10 @@ class KiteAuth:
 
     TOKEN_FILE = ".kite_token.json"
 
+    # token_path -> (file st_mtime_ns, day, access_token) already read or
+    # written by this process; a rewrite of the file changes the mtime
+    _persisted_tokens: Dict[Path, Tuple[int, date, str]] = {}
+
     def __init__(self, base_path: Optional[Path] = None):
         """
         Initialize KiteAuth.
@@ -72,25 +76,40 @@ class KiteAuth:
 
     def _persist_token(self, access_token: str) -> None:
         """Save access token with date to file."""
+        today = date.today()
         token_data = {
             "access_token": access_token,
-            "date": date.today().isoformat(),
+            "date": today.isoformat(),
             "timestamp": datetime.now().isoformat(),
         }
-        with open(self.token_path, "w") as f:
-            json.dump(token_data, f, indent=2)
+        self.token_path.write_text(json.dumps(token_data, indent=2))
+        self._persisted_tokens[self.token_path] = (
+            self.token_path.stat().st_mtime_ns, today, access_token
+        )
         logger.debug(f"Token persisted to {self.token_path}")
 
     def _load_persisted_token(self) -> Optional[str]:
         """Load today's access token from file if available."""
-        if not self.token_path.exists():
+        today = date.today()
+
+        try:
+            mtime_ns = self.token_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._persisted_tokens.pop(self.token_path, None)
             return None
 
+        # Serve from memory while the file is unchanged since it was read
+        cached = self._persisted_tokens.get(self.token_path)
+        if cached is not None and cached[0] == mtime_ns and cached[1] == today:
+            return cached[2]
+
         try:
-            with open(self.token_path, "r") as f:
-                data = json.load(f)
-            if data.get("date") == date.today().isoformat():
-                return data.get("access_token")
+            data = json.loads(self.token_path.read_bytes())
+            if data.get("date") == today.isoformat():
+                token = data.get("access_token")
+                if token:
+                    self._persisted_tokens[self.token_path] = (mtime_ns, today, token)
+                return token
             logger.info("Persisted token is from a previous day, ignoring")
             return None
         except (json.JSONDecodeError, KeyError) as e:
@@ -144,6 +163,9 @@ class KiteAuth:
         self.kite.set_access_token(access_token)
         if persist:
             self._persist_token(access_token)
+        else:
+            # The file no longer holds this process's current token
+            self._persisted_tokens.pop(self.token_path, None)
         logger.info("Access token set manually")
 
     def validate_session(self) -> bool:
@@ -165,6 +187,8 @@ class KiteAuth:
         except Exception as e:
             logger.error(f"Session validation failed: {e}")
             self._access_token = None
+            # Don't serve the rejected token from memory again
+            self._persisted_tokens.pop(self.token_path, None)
             return False
 
     def get_kite_client(self) -> KiteConnect:
@@ -3,22 +3,194 @@ Buffered CSV Writer
 
 Handles:
 - Buffered writing to CSV files
+- Background writer thread that owns all file I/O
 - Configurable flush intervals
 - Daily file rollover
 - SHUNYA naming conventions
 """
 
+import atexit
+import collections
 import csv
+import io
+import itertools
 import logging
+import operator
+import os
 import threading
-from datetime import date, datetime
+import time
+from datetime import date, datetime, time as dt_time, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Set
 
-from engines.zerodha.snapshot_builder import COLUMNS, format_csv_value
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from engines.zerodha.snapshot_builder import (
+    COLUMNS,
+    FLOAT_COLUMNS,
+    SIZE_COLUMNS,
+    format_csv_value,
+    format_float_column,
+    format_snapshot_for_csv,
+)
 
 logger = logging.getLogger(__name__)
 
+_get_columns = operator.itemgetter(*COLUMNS)
+_FLOAT_COLUMNS = frozenset(FLOAT_COLUMNS)
+_SIZE_COLUMNS = frozenset(SIZE_COLUMNS)
+
+# Per-kind cell expressions over local `v`. Each takes a fast path for the
+# expected type and otherwise defers to format_csv_value, so output is
+# identical to calling format_csv_value on every cell.
+_CELL_TEMPLATES = {
+    "int": "_str({v}) if {v}.__class__ is _int else _fmt({v})",
+    "float": "(_str(_int({v})) if _abs({v}) > 1e10 else _str({v})) if {v}.__class__ is _float else _fmt({v})",
+    "str": "{v} if {v}.__class__ is _str else _fmt({v})",
+}
+
+
+def _column_kind(col: str) -> str:
+    """Expected value type of a snapshot column."""
+    if col == "ts" or col.endswith("_sz"):
+        return "int"
+    if col.endswith("_px") or col in ("underlying_spot", "strike", "spread"):
+        return "float"
+    return "str"
+
+
+def _compile_row_formatter(columns: List[str]):
+    """
+    Generate a row formatter specialised to a fixed column layout.
+
+    The generated function unpacks the row (a tuple in column order, or a
+    dict via a single itemgetter call) and formats each cell inline, avoiding
+    a Python-level call per cell. This is deliberately not csv.DictWriter:
+    its per-row dict-to-list conversion is a Python generator over
+    fieldnames, which is slower than this formatter followed by
+    csv.writer.writerows on plain lists.
+    """
+    names = [f"v{i}" for i in range(len(columns))]
+    unpack = ", ".join(names) + ","
+    cells = ",\n        ".join(
+        _CELL_TEMPLATES[_column_kind(col)].format(v=name)
+        for col, name in zip(columns, names)
+    )
+    source = (
+        "def _format_row(row):\n"
+        "    if isinstance(row, _tuple):\n"
+        f"        {unpack} = row\n"
+        "    else:\n"
+        "        try:\n"
+        f"            {unpack} = _get_columns(row)\n"
+        "        except KeyError:\n"
+        "            # Sparse row: fall back to per-column lookup with None for missing keys\n"
+        f"            {unpack} = [row.get(col) for col in _columns]\n"
+        "    return [\n"
+        f"        {cells},\n"
+        "    ]\n"
+    )
+    namespace = {
+        "_get_columns": _get_columns,
+        "_columns": tuple(columns),
+        "_fmt": format_csv_value,
+        "_tuple": tuple,
+        "_str": str,
+        "_int": int,
+        "_float": float,
+        "_abs": abs,
+    }
+    exec(compile(source, f"<csv row formatter {len(columns)} cols>", "exec"), namespace)
+    return namespace["_format_row"]
+
+
+# Format a row (tuple or dict) into a COLUMNS-ordered list of CSV values
+_format_row = _compile_row_formatter(COLUMNS)
+
+
+def _render_csv(rows: List[List[Any]]) -> bytes:
+    """Serialize rows to UTF-8 encoded CSV in a single pass."""
+    payload = io.StringIO()
+    csv.writer(payload).writerows(rows)
+    return payload.getvalue().encode("utf-8")
+
+
+def _column_type(col: str) -> pa.DataType:
+    """Arrow type of a snapshot column."""
+    if col == "ts" or col in _SIZE_COLUMNS:
+        return pa.int64()
+    if col in _FLOAT_COLUMNS:
+        return pa.float64()
+    return pa.string()
+
+
+SCHEMA = pa.schema([(col, _column_type(col)) for col in COLUMNS])
+
+_CSV_OPTIONS = pa_csv.WriteOptions(include_header=False, quoting_style="none", eol="\r\n")
+
+
+def _columns_to_table(cols: Dict[str, np.ndarray]) -> pa.Table:
+    """
+    Convert snapshot columns from SnapshotBuilder.build_snapshot_columns to
+    an Arrow table. NaN becomes null, matching the empty cells in the CSV.
+    """
+    return pa.Table.from_arrays(
+        [
+            pa.array(cols[field.name], type=field.type, from_pandas=True)
+            for field in SCHEMA
+        ],
+        schema=SCHEMA,
+    )
+
+
+def _render_table(table: pa.Table) -> bytes:
+    """Serialize a snapshot table to UTF-8 CSV, same dialect as _render_csv."""
+    text = pa.Table.from_arrays(
+        [
+            pa.array(format_float_column(column.to_numpy()), pa.string())
+            if pa.types.is_floating(column.type) else column
+            for column in table.columns
+        ],
+        names=table.column_names,
+    )
+    sink = io.BytesIO()
+    try:
+        pa_csv.write_csv(text, sink, _CSV_OPTIONS)
+    except pa.ArrowInvalid:
+        # A string cell needs quoting; let the csv module apply QUOTE_MINIMAL
+        return _render_csv(format_snapshot_for_csv({
+            name: column.to_numpy(zero_copy_only=False)
+            for name, column in zip(table.column_names, table.columns)
+        }))
+    return sink.getvalue()
+
+
+def _render_piece(piece: Any) -> bytes:
+    """Serialize a buffered piece: a list of formatted rows or an Arrow table."""
+    if isinstance(piece, list):
+        return _render_csv(piece)
+    return _render_table(piece)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of data to fd, retrying on short writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+_UNDERLYING_INDEX = COLUMNS.index("underlying_symbol")
+
+
+def _underlying_key(row: Any) -> str:
+    """Routing key for a row (tuple or dict): its upper-cased underlying symbol."""
+    if isinstance(row, tuple):
+        return row[_UNDERLYING_INDEX].upper()
+    return row.get("underlying_symbol", "").upper()
+
 
 class CSVWriter:
     """Buffered CSV writer with rollover support."""
@@ -49,15 +221,35 @@ class CSVWriter:
 
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        self._buffer: List[List[Any]] = []
-        self._buffer_lock = threading.Lock()
+        # Producers only append formatted batches or snapshot tables
+        # (deque.append is atomic, so no lock); the writer thread drains them
+        # into _buffer and is the sole owner of the file descriptor
+        self._pending: Deque[Any] = collections.deque()
+        self._wakeup = threading.Event()
+        self._buffer: List[Any] = []
+        self._buffered_rows: int = 0
         self._current_file: Optional[Path] = None
-        self._file_handle = None
-        self._csv_writer = None
+        # Raw O_APPEND descriptor; each flush is one os.write of pre-encoded bytes
+        self._fd: Optional[int] = None
+        # Files this writer has already seen with a header; reopening them
+        # skips the existence check
+        self._headed_files: Set[Path] = set()
         self._start_date: Optional[date] = None
+        # Epoch seconds of the midnight that ends _start_date
+        self._rollover_at: float = 0.0
         self._last_flush_time: Optional[datetime] = None
         self._rows_written: int = 0
 
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop,
+            name=f"csv-writer-{self.underlying}",
+            daemon=True,
+        )
+        self._writer_thread.start()
+
+        # Flush buffered rows on interpreter shutdown even if close() is never called
+        atexit.register(self.close)
+
     def _get_filename(self, start_date: date, end_date: Optional[date] = None) -> str:
         """
         Generate filename following SHUNYA convention.
@@ -68,39 +260,46 @@ class CSVWriter:
         end_str = (end_date or start_date).strftime("%Y%m%d")
         return f"{self.underlying}_{self.venue}_OPTION_CHAIN_1S_{start_str}_{end_str}.csv"
 
+    def _set_start_date(self, for_date: date) -> None:
+        """Start a new output day, scheduling its rollover at the next midnight."""
+        self._start_date = for_date
+        self._rollover_at = datetime.combine(for_date + timedelta(days=1), dt_time.min).timestamp()
+
+    def _is_open(self) -> bool:
+        """Whether an output file is currently open."""
+        return self._fd is not None
+
     def _open_file(self, for_date: date) -> None:
         """Open a new file for writing."""
         self._close_file()
 
-        self._start_date = for_date
+        self._set_start_date(for_date)
         filename = self._get_filename(for_date)
         self._current_file = self.output_dir / filename
 
         # Check if file exists to determine if we need header
-        file_exists = self._current_file.exists()
+        file_exists = self._current_file in self._headed_files or self._current_file.exists()
 
-        self._file_handle = open(self._current_file, "a", newline="", buffering=1)
-        self._csv_writer = csv.writer(self._file_handle)
+        self._fd = os.open(self._current_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
 
         if not file_exists:
-            self._csv_writer.writerow(COLUMNS)
+            _write_all(self._fd, _render_csv([COLUMNS]))
             logger.info(f"Created new file with header: {self._current_file}")
         else:
             logger.info(f"Appending to existing file: {self._current_file}")
+        self._headed_files.add(self._current_file)
 
         self._last_flush_time = datetime.now()
 
     def _close_file(self) -> None:
         """Close the current file."""
-        if self._file_handle:
+        if self._fd is not None:
             try:
-                self._file_handle.flush()
-                self._file_handle.close()
+                os.close(self._fd)
             except Exception as e:
                 logger.error(f"Error closing file: {e}")
             finally:
-                self._file_handle = None
-                self._csv_writer = None
+                self._fd = None
 
     def _rename_with_end_date(self) -> None:
         """Rename file to include actual end date."""
@@ -123,92 +322,148 @@ class CSVWriter:
 
     def _check_rollover(self) -> None:
         """Check if we need to roll over to a new file."""
+        # Steady state is a single float compare; only build dates near midnight
+        if self._start_date is None or time.time() < self._rollover_at:
+            return
+
         today = date.today()
-        if self._start_date and self._start_date != today:
+        if self._start_date != today:
             logger.info(f"Day rollover detected: {self._start_date} -> {today}")
             self._rename_with_end_date()
             self._open_file(today)
 
-    def write_row(self, row: Dict[str, Any]) -> None:
+    def write_row(self, row: Any) -> None:
         """
-        Add a row to the buffer.
+        Queue a row for writing.
 
         Args:
-            row: Row dictionary with column values.
+            row: Row tuple in COLUMNS order, or dictionary of column values.
         """
-        # Format row values
-        formatted = [format_csv_value(row.get(col)) for col in COLUMNS]
+        self._enqueue([_format_row(row)])
 
-        with self._buffer_lock:
-            self._buffer.append(formatted)
+    def write_rows(self, rows: List[Any]) -> None:
+        """
+        Queue multiple rows for writing.
 
-            # Check if we should flush
-            if len(self._buffer) >= self.flush_rows:
-                self._do_flush()
+        Args:
+            rows: List of row tuples or dictionaries.
+        """
+        if rows:
+            self._enqueue(list(map(_format_row, rows)))
 
-    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+    def write_columns(self, cols: Dict[str, np.ndarray]) -> None:
         """
-        Add multiple rows to the buffer.
+        Queue a columnar snapshot for writing.
 
         Args:
-            rows: List of row dictionaries.
+            cols: Column arrays from SnapshotBuilder.build_snapshot_columns.
         """
-        formatted_rows = []
-        for row in rows:
-            formatted = [format_csv_value(row.get(col)) for col in COLUMNS]
-            formatted_rows.append(formatted)
-
-        with self._buffer_lock:
-            self._buffer.extend(formatted_rows)
+        table = _columns_to_table(cols)
+        if table.num_rows:
+            # Rendered to CSV on the writer thread
+            self._enqueue(table)
+
+    def _enqueue(self, item: Any) -> None:
+        """Hand an item to the writer thread, waking it if a flush is due."""
+        self._pending.append(item)
+        # Each pending batch holds at least one row, so the batch count is a
+        # lower bound on pending rows
+        if (
+            item is None
+            or isinstance(item, threading.Event)
+            or len(item) >= self.flush_rows
+            or len(self._pending) >= self.flush_rows
+        ):
+            self._wakeup.set()
+
+    def _writer_loop(self) -> None:
+        """
+        Drain pending rows to disk. Runs on the writer thread.
 
-            if len(self._buffer) >= self.flush_rows:
+        Pending items are lists of formatted rows, snapshot Arrow tables, a
+        threading.Event requesting a flush, or None to stop. Rows are written
+        once flush_rows accumulate or flush_interval_seconds elapse,
+        whichever comes first.
+        """
+        deadline = time.monotonic() + self.flush_interval_seconds
+        stopping = False
+        while not stopping:
+            self._wakeup.wait(max(0.0, deadline - time.monotonic()))
+            self._wakeup.clear()
+
+            flush_requests = []
+            while self._pending:
+                item = self._pending.popleft()
+                if item is None:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    flush_requests.append(item)
+                else:
+                    self._buffer.append(item)
+                    self._buffered_rows += len(item)
+
+            if (
+                stopping
+                or flush_requests
+                or self._buffered_rows >= self.flush_rows
+                or time.monotonic() >= deadline
+            ):
                 self._do_flush()
+                deadline = time.monotonic() + self.flush_interval_seconds
+
+            for done in flush_requests:
+                done.set()
 
     def _do_flush(self) -> None:
-        """Flush buffer to disk. Must be called with lock held."""
+        """Flush buffer to disk. Only called from the writer thread."""
         if not self._buffer:
             return
 
-        # Check rollover
-        self._check_rollover()
+        try:
+            # Check rollover
+            self._check_rollover()
 
-        # Ensure file is open
-        if self._csv_writer is None:
-            self._open_file(date.today())
+            # Ensure file is open
+            if not self._is_open():
+                self._open_file(date.today())
 
-        # Write buffer
-        try:
-            self._csv_writer.writerows(self._buffer)
-            self._file_handle.flush()
-            self._rows_written += len(self._buffer)
-            logger.debug(f"Flushed {len(self._buffer)} rows, total: {self._rows_written}")
+            self._write_buffer()
+            self._rows_written += self._buffered_rows
+            logger.debug(f"Flushed {self._buffered_rows} rows, total: {self._rows_written}")
         except Exception as e:
             logger.error(f"Error writing to CSV: {e}")
         finally:
             self._buffer.clear()
+            self._buffered_rows = 0
             self._last_flush_time = datetime.now()
 
+    def _write_buffer(self) -> None:
+        """Write the buffered pieces to the open file."""
+        # Render the whole batch in memory so it reaches the file in one write()
+        _write_all(self._fd, b"".join(map(_render_piece, self._buffer)))
+
     def flush(self) -> None:
-        """Force flush the buffer."""
-        with self._buffer_lock:
-            self._do_flush()
+        """Block until every row queued so far has been written."""
+        if not self._writer_thread.is_alive():
+            return
+        done = threading.Event()
+        self._enqueue(done)
+        done.wait()
 
     def check_time_flush(self) -> None:
-        """Flush if enough time has passed since last flush."""
-        if self._last_flush_time is None:
-            return
+        """
+        Time-based flushing is handled by the writer thread.
 
-        elapsed = (datetime.now() - self._last_flush_time).total_seconds()
-        if elapsed >= self.flush_interval_seconds:
-            with self._buffer_lock:
-                if self._buffer:
-                    self._do_flush()
+        Kept so callers that still poll continue to work.
+        """
 
     def close(self) -> None:
         """Close the writer and flush remaining data."""
-        with self._buffer_lock:
-            if self._buffer:
-                self._do_flush()
+        atexit.unregister(self.close)
+        if self._writer_thread.is_alive():
+            self._enqueue(None)
+            self._writer_thread.join()
         self._close_file()
         logger.info(f"CSVWriter closed. Total rows written: {self._rows_written}")
 
@@ -217,7 +472,7 @@ class CSVWriter:
         return {
             "current_file": str(self._current_file) if self._current_file else None,
             "rows_written": self._rows_written,
-            "buffer_size": len(self._buffer),
+            "buffer_size": self._buffered_rows,
             "start_date": str(self._start_date) if self._start_date else None,
         }
 
@@ -229,9 +484,25 @@ class CSVWriter:
         return False
 
 
+def _split_by_underlying(cols: Dict[str, np.ndarray]):
+    """
+    Yield (underlying, column slices) for each contiguous run of rows sharing
+    an underlying. Slices are views, not copies.
+    """
+    symbols = cols["underlying_symbol"]
+    n = len(symbols)
+    if not n:
+        return
+    starts = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+    for start, stop in zip(itertools.chain((0,), starts), itertools.chain(starts, (n,))):
+        yield str(symbols[start]).upper(), {col: values[start:stop] for col, values in cols.items()}
+
+
 class MultiCSVWriter:
     """Manages multiple CSV writers, one per underlying."""
 
+    writer_class = CSVWriter
+
     def __init__(
         self,
         output_dir: Path,
@@ -255,7 +526,7 @@ class MultiCSVWriter:
 
         self._writers: Dict[str, CSVWriter] = {}
         for underlying in underlyings:
-            self._writers[underlying.upper()] = CSVWriter(
+            self._writers[underlying.upper()] = self.writer_class(
                 output_dir=self.output_dir,
                 underlying=underlying,
                 venue=venue,
@@ -263,30 +534,32 @@ class MultiCSVWriter:
                 flush_interval_seconds=flush_interval_seconds,
             )
 
-    def write_row(self, row: Dict[str, Any]) -> None:
+    def write_row(self, row: Any) -> None:
         """Write a row to the appropriate underlying's file."""
-        underlying = row.get("underlying_symbol", "").upper()
+        underlying = _underlying_key(row)
         writer = self._writers.get(underlying)
         if writer:
             writer.write_row(row)
         else:
             logger.warning(f"No writer for underlying: {underlying}")
 
-    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+    def write_rows(self, rows: List[Any]) -> None:
         """Write multiple rows, routing to appropriate files."""
-        # Group by underlying
-        by_underlying: Dict[str, List[Dict[str, Any]]] = {}
-        for row in rows:
-            underlying = row.get("underlying_symbol", "").upper()
-            if underlying not in by_underlying:
-                by_underlying[underlying] = []
-            by_underlying[underlying].append(row)
-
-        # Write to each
-        for underlying, underlying_rows in by_underlying.items():
+        # Snapshot rows arrive grouped by underlying, so split on contiguous
+        # runs; a batch for a single underlying is dispatched in one call
+        for underlying, group in itertools.groupby(rows, key=_underlying_key):
+            writer = self._writers.get(underlying)
+            if writer:
+                writer.write_rows(list(group))
+
+    def write_columns(self, cols: Dict[str, np.ndarray]) -> None:
+        """Write a columnar snapshot, routing each underlying's rows to its file."""
+        # Snapshot rows arrive grouped by underlying, so each group is a
+        # contiguous slice of every column
+        for underlying, group in _split_by_underlying(cols):
             writer = self._writers.get(underlying)
             if writer:
-                writer.write_rows(underlying_rows)
+                writer.write_columns(group)
 
     def flush(self) -> None:
         """Flush all writers."""
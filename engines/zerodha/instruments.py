@@ -3,20 +3,49 @@ Zerodha Instrument Master Loader
 
 Handles:
 - Fetching NFO instruments from Kite Connect
-- Caching daily instrument dumps to CSV
+- Caching daily instrument dumps to Parquet
 - Building lookup dictionaries by instrument_token and tradingsymbol
 """
 
+import bisect
+import collections
 import logging
+import threading
 from datetime import date
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from kiteconnect import KiteConnect
 
 logger = logging.getLogger(__name__)
 
+# Loader attributes built from the instrument dump
+_LOOKUP_ATTRS = (
+    "_instruments_df",
+    "_token_to_meta",
+    "_symbol_to_token",
+    "_strikes_by_expiry",
+    "_sorted_expiries",
+    "_option_rows_by_underlying",
+)
+
+# (exchange, date) -> {attr: value} for _LOOKUP_ATTRS, shared by every loader
+# in the process so lookups are built once per exchange per day. A small LRU:
+# inserting a day drops older days of the same exchange, and at most
+# _LOOKUP_CACHE_SIZE exchanges are kept
+_LOOKUP_CACHE: "collections.OrderedDict[Tuple[str, date], Dict[str, Any]]" = (
+    collections.OrderedDict()
+)
+_LOOKUP_CACHE_LOCK = threading.Lock()
+_LOOKUP_CACHE_SIZE = 4
+
+# Columns filtered on repeatedly; stored as pandas categoricals
+CATEGORICAL_COLUMNS = ("name", "instrument_type", "segment")
+
 
 class InstrumentLoader:
     """Loads and caches Zerodha instrument master data."""
@@ -32,7 +61,7 @@ class InstrumentLoader:
 
         Args:
             kite: Authenticated KiteConnect client.
-            cache_dir: Directory to store instrument dump CSVs.
+            cache_dir: Directory to store instrument dump files.
             exchange: Exchange to fetch instruments for.
         """
         self.kite = kite
@@ -43,11 +72,17 @@ class InstrumentLoader:
         self._instruments_df: Optional[pd.DataFrame] = None
         self._token_to_meta: Dict[int, Dict[str, Any]] = {}
         self._symbol_to_token: Dict[str, int] = {}
-
-    def _get_cache_path(self, for_date: Optional[date] = None) -> Path:
+        # underlying -> expiry -> sorted unique strikes
+        self._strikes_by_expiry: Dict[str, Dict[date, np.ndarray]] = {}
+        # underlying -> ascending expiry dates
+        self._sorted_expiries: Dict[str, List[date]] = {}
+        # underlying -> positional row indices of its CE/PE contracts
+        self._option_rows_by_underlying: Dict[str, np.ndarray] = {}
+
+    def _get_cache_path(self, for_date: Optional[date] = None, suffix: str = ".parquet") -> Path:
         """Get cache file path for a given date."""
         target_date = for_date or date.today()
-        filename = f"instruments_{self.exchange}_{target_date.strftime('%Y%m%d')}.csv"
+        filename = f"instruments_{self.exchange}_{target_date.strftime('%Y%m%d')}{suffix}"
         return self.cache_dir / filename
 
     def _load_from_cache(self, for_date: Optional[date] = None) -> Optional[pd.DataFrame]:
@@ -55,14 +90,26 @@ class InstrumentLoader:
         cache_path = self._get_cache_path(for_date)
         if cache_path.exists():
             logger.info(f"Loading instruments from cache: {cache_path}")
-            df = pd.read_csv(cache_path, parse_dates=["expiry"])
+            # Parquet keeps dtypes (including datetime64 expiry), so no re-parsing.
+            # Memory-mapping lets Arrow decode straight from the page cache
+            # without an intermediate read buffer; to_pandas() then copies into
+            # the DataFrame, so nothing stays mapped once loading returns.
+            with pa.memory_map(str(cache_path), "r") as source:
+                return pq.read_table(source).to_pandas()
+
+        # One-shot migration of a CSV dump written by older versions
+        legacy_path = self._get_cache_path(for_date, suffix=".csv")
+        if legacy_path.exists():
+            logger.info(f"Migrating CSV instrument cache to Parquet: {legacy_path}")
+            df = pd.read_csv(legacy_path, parse_dates=["expiry"])
+            self._save_to_cache(df, for_date)
             return df
         return None
 
     def _save_to_cache(self, df: pd.DataFrame, for_date: Optional[date] = None) -> None:
         """Save instruments to cache."""
         cache_path = self._get_cache_path(for_date)
-        df.to_csv(cache_path, index=False)
+        df.to_parquet(cache_path, compression="zstd", index=False)
         logger.info(f"Saved {len(df)} instruments to cache: {cache_path}")
 
     def fetch_instruments(self, force_refresh: bool = False) -> pd.DataFrame:
@@ -76,8 +123,20 @@ class InstrumentLoader:
             DataFrame of instruments.
         """
         if not force_refresh:
+            key = (self.exchange, date.today())
+            with _LOOKUP_CACHE_LOCK:
+                lookups = _LOOKUP_CACHE.get(key)
+                if lookups is not None:
+                    _LOOKUP_CACHE.move_to_end(key)
+            if lookups is not None:
+                for attr, value in lookups.items():
+                    setattr(self, attr, value)
+                logger.debug(f"Using in-memory instrument lookups for {self.exchange}")
+                return self._instruments_df
+
             cached = self._load_from_cache()
             if cached is not None:
+                cached = self._to_categorical(cached)
                 self._instruments_df = cached
                 self._build_lookups()
                 return cached
@@ -94,6 +153,7 @@ class InstrumentLoader:
         if "expiry" in df.columns:
             df["expiry"] = pd.to_datetime(df["expiry"])
 
+        df = self._to_categorical(df)
         self._save_to_cache(df)
         self._instruments_df = df
         self._build_lookups()
@@ -101,33 +161,96 @@ class InstrumentLoader:
         logger.info(f"Loaded {len(df)} instruments from {self.exchange}")
         return df
 
+    @staticmethod
+    def _to_categorical(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store low-cardinality string columns as categoricals.
+
+        Equality and isin() on these columns then compare integer codes
+        instead of Python strings.
+        """
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+        return df
+
     def _build_lookups(self) -> None:
         """Build lookup dictionaries from instruments DataFrame."""
         if self._instruments_df is None:
             return
 
-        self._token_to_meta.clear()
-        self._symbol_to_token.clear()
-
-        for _, row in self._instruments_df.iterrows():
-            token = int(row["instrument_token"])
-            symbol = row["tradingsymbol"]
-
-            self._token_to_meta[token] = {
-                "tradingsymbol": symbol,
-                "name": row.get("name", ""),
-                "expiry": row.get("expiry"),
-                "strike": row.get("strike"),
-                "instrument_type": row.get("instrument_type", ""),
-                "lot_size": row.get("lot_size", 1),
-                "tick_size": row.get("tick_size", 0.05),
-                "exchange": row.get("exchange", self.exchange),
-                "segment": row.get("segment", ""),
-            }
-            self._symbol_to_token[symbol] = token
+        df = self._instruments_df
+        n_rows = len(df)
+
+        def column(name: str, default: Any) -> List[Any]:
+            if name in df.columns:
+                return df[name].tolist()
+            return [default] * n_rows
+
+        tokens = df["instrument_token"].astype("int64").tolist()
+        symbols = df["tradingsymbol"].tolist()
+        meta_columns = zip(
+            symbols,
+            column("name", ""),
+            column("expiry", None),
+            column("strike", None),
+            column("instrument_type", ""),
+            column("lot_size", 1),
+            column("tick_size", 0.05),
+            column("exchange", self.exchange),
+            column("segment", ""),
+        )
+        meta_keys = (
+            "tradingsymbol",
+            "name",
+            "expiry",
+            "strike",
+            "instrument_type",
+            "lot_size",
+            "tick_size",
+            "exchange",
+            "segment",
+        )
+
+        # Column-wise extraction avoids boxing every row into a Series
+        self._token_to_meta = {
+            token: dict(zip(meta_keys, values))
+            for token, values in zip(tokens, meta_columns)
+        }
+        self._symbol_to_token = dict(zip(symbols, tokens))
+        self._build_underlying_index()
+
+        key = (self.exchange, date.today())
+        with _LOOKUP_CACHE_LOCK:
+            for stale in [k for k in _LOOKUP_CACHE if k[0] == self.exchange and k != key]:
+                del _LOOKUP_CACHE[stale]
+            _LOOKUP_CACHE[key] = {attr: getattr(self, attr) for attr in _LOOKUP_ATTRS}
+            _LOOKUP_CACHE.move_to_end(key)
+            while len(_LOOKUP_CACHE) > _LOOKUP_CACHE_SIZE:
+                _LOOKUP_CACHE.popitem(last=False)
 
         logger.debug(f"Built lookups: {len(self._token_to_meta)} tokens, {len(self._symbol_to_token)} symbols")
 
+    def _build_underlying_index(self) -> None:
+        """Index option rows, sorted strikes and expiries by underlying."""
+        df = self._instruments_df
+        option_positions = np.flatnonzero(df["instrument_type"].isin(["CE", "PE"]).to_numpy())
+        options = df.iloc[option_positions]
+
+        self._option_rows_by_underlying = {
+            underlying: option_positions[rows]
+            for underlying, rows in options.groupby("name", observed=True).indices.items()
+        }
+
+        index: Dict[str, Dict[date, np.ndarray]] = {}
+        grouped = options.groupby(["name", "expiry"], observed=True)["strike"]
+        for (underlying, expiry), strikes in grouped:
+            index.setdefault(underlying, {})[expiry.date()] = np.unique(strikes.to_numpy())
+        self._strikes_by_expiry = index
+        self._sorted_expiries = {
+            underlying: sorted(by_expiry) for underlying, by_expiry in index.items()
+        }
+
     def get_by_token(self, token: int) -> Optional[Dict[str, Any]]:
         """Get instrument metadata by token."""
         return self._token_to_meta.get(token)
@@ -161,21 +284,48 @@ class InstrumentLoader:
         """
         df = self.get_instruments_df()
 
-        # Filter for options (CE or PE)
-        mask = df["instrument_type"].isin(["CE", "PE"])
+        # Start from the underlying's precomputed CE/PE rows instead of
+        # masking the whole table
+        rows = self._option_rows_by_underlying.get(underlying)
+        if rows is None:
+            return df.iloc[0:0].copy()
+        options = df.iloc[rows]
 
-        # Filter by underlying name
-        mask &= df["name"] == underlying
+        mask = np.ones(len(options), dtype=bool)
 
         if expiry is not None:
             if isinstance(expiry, str):
                 expiry = pd.to_datetime(expiry).date()
-            mask &= pd.to_datetime(df["expiry"]).dt.date == expiry
+            mask &= (options["expiry"] == pd.Timestamp(expiry)).to_numpy()
 
         if option_types:
-            mask &= df["instrument_type"].isin(option_types)
+            mask &= options["instrument_type"].isin(option_types).to_numpy()
+
+        return options[mask].copy()
+
+    def filter_options_multi(self, underlying: str, expiries: List[date]) -> pd.DataFrame:
+        """
+        Filter instruments to options for an underlying across several expiries.
 
-        return df[mask].copy()
+        Equivalent to concatenating filter_options(underlying, expiry) for each
+        expiry, but done in a single pass.
+
+        Args:
+            underlying: Underlying name (e.g., "NIFTY", "BANKNIFTY").
+            expiries: Expiry dates to keep.
+
+        Returns:
+            Filtered DataFrame of option instruments.
+        """
+        df = self.get_instruments_df()
+
+        rows = self._option_rows_by_underlying.get(underlying)
+        if rows is None:
+            return df.iloc[0:0].copy()
+        options = df.iloc[rows]
+
+        mask = options["expiry"].isin([pd.Timestamp(e) for e in expiries]).to_numpy()
+        return options[mask].copy()
 
     def get_unique_expiries(self, underlying: str) -> List[date]:
         """
@@ -187,12 +337,8 @@ class InstrumentLoader:
         Returns:
             List of expiry dates, sorted ascending.
         """
-        df = self.filter_options(underlying)
-        if df.empty:
-            return []
-
-        expiries = pd.to_datetime(df["expiry"]).dt.date.unique()
-        return sorted(expiries)
+        self.get_instruments_df()
+        return list(self._sorted_expiries.get(underlying, []))
 
     def get_nearest_expiry(self, underlying: str, after_date: Optional[date] = None) -> Optional[date]:
         """
@@ -206,13 +352,11 @@ class InstrumentLoader:
             Nearest expiry date or None if no valid expiries.
         """
         reference = after_date or date.today()
-        expiries = self.get_unique_expiries(underlying)
+        self.get_instruments_df()
+        expiries = self._sorted_expiries.get(underlying, [])
 
-        for exp in expiries:
-            if exp >= reference:
-                return exp
-
-        return None
+        i = bisect.bisect_left(expiries, reference)
+        return expiries[i] if i < len(expiries) else None
 
     def get_strikes_around_atm(
         self,
@@ -235,17 +379,18 @@ class InstrumentLoader:
         Returns:
             List of strike prices within range.
         """
-        df = self.filter_options(underlying, expiry)
-        if df.empty:
-            return []
-
-        strikes = sorted(df["strike"].unique())
+        self.get_instruments_df()
+        if isinstance(expiry, str):
+            expiry = pd.to_datetime(expiry).date()
 
-        lower_bound = atm_price - max_distance
-        upper_bound = atm_price + max_distance
+        strikes = self._strikes_by_expiry.get(underlying, {}).get(expiry)
+        if strikes is None:
+            return []
 
-        filtered = [s for s in strikes if lower_bound <= s <= upper_bound]
-        return filtered
+        # Binary search the pre-sorted strikes instead of rescanning the master table
+        lo = np.searchsorted(strikes, atm_price - max_distance, side="left")
+        hi = np.searchsorted(strikes, atm_price + max_distance, side="right")
+        return strikes[lo:hi].tolist()
 
 
 if __name__ == "__main__":
@@ -8,10 +8,14 @@ Builds the set of option contracts to stream based on:
 """
 
 import logging
+import sys
+from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Set
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 from kiteconnect import KiteConnect
 
@@ -20,6 +24,35 @@ from engines.zerodha.instruments import InstrumentLoader
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class ContractMeta:
+    """Static metadata for one option contract in the universe."""
+
+    __slots__ = (
+        "instrument_token",
+        "tradingsymbol",
+        "underlying",
+        "expiry",
+        "expiry_yyyymmdd",
+        "strike",
+        "option_type",
+        "option_type_short",
+        "instrument_id",
+        "lot_size",
+    )
+
+    instrument_token: int
+    tradingsymbol: str
+    underlying: str
+    expiry: str            # YYYY-MM-DD
+    expiry_yyyymmdd: str
+    strike: float
+    option_type: str       # CE or PE
+    option_type_short: str  # C or P
+    instrument_id: str
+    lot_size: int
+
+
 class OptionUniverse:
     """Selects and manages the option contracts universe for streaming."""
 
@@ -50,12 +83,29 @@ class OptionUniverse:
         self.max_strike_distance = max_strike_distance
         self.strike_step_overrides = strike_step_overrides or {}
 
-        # token -> contract metadata
-        self._universe: Dict[int, Dict[str, Any]] = {}
+        # token -> contract metadata; build_universe publishes a new dict
+        # rather than mutating this one, so readers never see a partial build
+        self._universe: Dict[int, ContractMeta] = {}
+        # Read-only view of _universe, one per build so callers can compare with `is`
+        self._universe_view: Mapping[int, ContractMeta] = MappingProxyType(self._universe)
+        # (universe, arrays, token -> row) projection of _universe, built
+        # lazily by get_universe_arrays
+        self._projection: Optional[
+            Tuple[Dict[int, ContractMeta], Dict[str, np.ndarray], Dict[int, int]]
+        ] = None
+        # Tokens of _universe in order, as a list and as int64, cached per build
+        self._tokens_list: List[int] = []
+        self._tokens_array: np.ndarray = np.empty(0, dtype=np.int64)
+        # underlying -> tokens in _universe, maintained by build_universe
+        self._tokens_by_underlying: Dict[str, List[int]] = {}
         # underlying -> spot price (updated dynamically)
         self._spot_prices: Dict[str, float] = {}
         # underlying -> selected expiry dates
         self._selected_expiries: Dict[str, List[date]] = {}
+        # (underlying, day, mode, explicit list) -> selected expiry dates
+        self._expiry_cache: Dict[tuple, List[date]] = {}
+        # Inputs of the last build; refresh_universe skips rebuilding on a match
+        self._last_build_signature: Optional[tuple] = None
 
     def set_spot_price(self, underlying: str, spot: float) -> None:
         """Update spot price for an underlying (used for ATM calculation)."""
@@ -65,15 +115,47 @@ class OptionUniverse:
         """Get the current spot price for an underlying."""
         return self._spot_prices.get(underlying)
 
+    def invalidate_expiry_cache(self) -> None:
+        """Drop cached expiry selections (e.g. after the instrument dump is refreshed)."""
+        self._expiry_cache.clear()
+        self._last_build_signature = None
+
+    def _build_signature(self) -> tuple:
+        """Everything build_universe depends on besides the instrument dump."""
+        return (
+            tuple(sorted(self._spot_prices.items())),
+            date.today(),
+            self.expiries_mode,
+            tuple(self.expiry_list),
+            self.max_strike_distance,
+        )
+
     def _select_expiries(self, underlying: str) -> List[date]:
         """
         Select expiries for an underlying based on mode.
 
+        Selections are cached per day, so rebuilds triggered by spot moves
+        do not redo them.
+
         Returns:
             List of selected expiry dates.
         """
-        all_expiries = self.loader.get_unique_expiries(underlying)
         today = date.today()
+        cache_key = (underlying, today, self.expiries_mode, tuple(self.expiry_list))
+        selected = self._expiry_cache.get(cache_key)
+        if selected is None:
+            selected = self._compute_expiries(underlying, today)
+            self._expiry_cache[cache_key] = selected
+        return list(selected)
+
+    def _compute_expiries(self, underlying: str, today: date) -> List[date]:
+        """
+        Apply the expiry selection mode to an underlying's listed expiries.
+
+        Returns:
+            List of selected expiry dates.
+        """
+        all_expiries = self.loader.get_unique_expiries(underlying)
 
         # Filter to valid (future) expiries
         valid_expiries = [e for e in all_expiries if e >= today]
@@ -104,11 +186,16 @@ class OptionUniverse:
             return monthly[:3]
 
         elif self.expiries_mode == "explicit_list":
+            valid_set = set(valid_expiries)
             explicit_dates = []
             for exp_str in self.expiry_list:
                 try:
-                    exp_date = datetime.strptime(exp_str, "%Y-%m-%d").date()
-                    if exp_date in valid_expiries:
+                    try:
+                        exp_date = date.fromisoformat(exp_str)
+                    except ValueError:
+                        # fromisoformat needs zero-padded fields; keep accepting e.g. 2026-1-8
+                        exp_date = datetime.strptime(exp_str, "%Y-%m-%d").date()
+                    if exp_date in valid_set:
                         explicit_dates.append(exp_date)
                 except ValueError:
                     logger.warning(f"Invalid expiry date format: {exp_str}")
@@ -121,7 +208,7 @@ class OptionUniverse:
     def build_universe(
         self,
         spot_prices: Optional[Dict[str, float]] = None,
-    ) -> Dict[int, Dict[str, Any]]:
+    ) -> Mapping[int, ContractMeta]:
         """
         Build the option universe based on configuration.
 
@@ -129,15 +216,18 @@ class OptionUniverse:
             spot_prices: Optional dict of underlying -> spot price for ATM calculation.
 
         Returns:
-            Dict mapping instrument_token to contract metadata.
+            Read-only mapping of instrument_token to ContractMeta.
         """
         if spot_prices:
             self._spot_prices.update(spot_prices)
+        signature = self._build_signature()
 
-        self._universe.clear()
-        self._selected_expiries.clear()
+        universe: Dict[int, ContractMeta] = {}
+        selected_expiries: Dict[str, List[date]] = {}
+        tokens_by_underlying: Dict[str, List[int]] = {}
 
         for underlying in self.underlyings:
+            underlying = sys.intern(underlying)
             spot = self._spot_prices.get(underlying)
             if spot is None:
                 logger.warning(f"No spot price for {underlying}, using wide strike band")
@@ -145,10 +235,12 @@ class OptionUniverse:
                 effective_spot = 25000 if underlying == "NIFTY" else 50000
             else:
                 effective_spot = spot
+            lower_strike = effective_spot - self.max_strike_distance
+            upper_strike = effective_spot + self.max_strike_distance
 
             # Select expiries
             expiries = self._select_expiries(underlying)
-            self._selected_expiries[underlying] = expiries
+            selected_expiries[underlying] = expiries
 
             if not expiries:
                 logger.warning(f"No expiries selected for {underlying}")
@@ -156,62 +248,143 @@ class OptionUniverse:
 
             logger.info(f"{underlying}: selected expiries {expiries}")
 
-            # Get options for each expiry
-            for expiry in expiries:
-                options_df = self.loader.filter_options(underlying, expiry)
+            # Filter all selected expiries in one pass, then split per expiry
+            all_options = self.loader.filter_options_multi(underlying, expiries)
+            rows_by_expiry = all_options.groupby("expiry").indices
 
-                if options_df.empty:
+            for expiry in expiries:
+                expiry_rows = rows_by_expiry.get(pd.Timestamp(expiry))
+                if expiry_rows is None:
                     logger.warning(f"No options found for {underlying} expiry {expiry}")
                     continue
-
-                # Filter by strike distance
-                options_df = options_df[
-                    (options_df["strike"] >= effective_spot - self.max_strike_distance) &
-                    (options_df["strike"] <= effective_spot + self.max_strike_distance)
-                ]
+                options_df = all_options.iloc[expiry_rows]
+
+                # Filter by strike distance with a single NumPy mask
+                strike_arr = options_df["strike"].to_numpy()
+                in_band = (strike_arr >= lower_strike) & (strike_arr <= upper_strike)
+                options_df = options_df.iloc[in_band]
+
+                # Every row shares the loop's expiry, so format it once. Static
+                # strings are interned so rebuilds and every snapshot row share
+                # one object per value
+                expiry_str = sys.intern(expiry.isoformat())
+                expiry_yyyymmdd = sys.intern(expiry.strftime("%Y%m%d"))
+                # Deterministic instrument_id is {prefix}{strike}{CE|PE}
+                id_prefix = f"{underlying}_{expiry_yyyymmdd}_"
+
+                tokens = options_df["instrument_token"].astype("int64").tolist()
+                symbols = list(map(sys.intern, options_df["tradingsymbol"].tolist()))
+                strikes = options_df["strike"].astype("float64").tolist()
+                opt_type_arr = options_df["instrument_type"].to_numpy()  # CE or PE
+                opt_types = list(map(sys.intern, opt_type_arr.tolist()))
+                opt_types_short = list(
+                    map(sys.intern, np.where(opt_type_arr == "CE", "C", "P").tolist())
+                )
+                if "lot_size" in options_df.columns:
+                    lot_sizes = options_df["lot_size"].tolist()
+                else:
+                    lot_sizes = [1] * len(tokens)
 
                 # Add to universe
-                for _, row in options_df.iterrows():
-                    token = int(row["instrument_token"])
-                    expiry_date = row["expiry"]
-                    if isinstance(expiry_date, pd.Timestamp):
-                        expiry_str = expiry_date.strftime("%Y-%m-%d")
-                        expiry_yyyymmdd = expiry_date.strftime("%Y%m%d")
-                    else:
-                        expiry_str = str(expiry_date)
-                        expiry_yyyymmdd = expiry_str.replace("-", "")
-
-                    strike = float(row["strike"])
-                    opt_type = row["instrument_type"]  # CE or PE
-
-                    # Build deterministic instrument_id
-                    instrument_id = f"{underlying}_{expiry_yyyymmdd}_{int(strike)}{opt_type}"
-
-                    self._universe[token] = {
-                        "instrument_token": token,
-                        "tradingsymbol": row["tradingsymbol"],
-                        "underlying": underlying,
-                        "expiry": expiry_str,
-                        "expiry_yyyymmdd": expiry_yyyymmdd,
-                        "strike": strike,
-                        "option_type": opt_type,
-                        "option_type_short": "C" if opt_type == "CE" else "P",
-                        "instrument_id": instrument_id,
-                        "lot_size": row.get("lot_size", 1),
-                    }
-
-        logger.info(f"Built universe with {len(self._universe)} option contracts")
-        return self._universe
+                universe.update({
+                    token: ContractMeta(
+                        instrument_token=token,
+                        tradingsymbol=symbol,
+                        underlying=underlying,
+                        expiry=expiry_str,
+                        expiry_yyyymmdd=expiry_yyyymmdd,
+                        strike=strike,
+                        option_type=opt_type,
+                        option_type_short=opt_type_short,
+                        instrument_id=f"{id_prefix}{int(strike)}{opt_type}",
+                        lot_size=lot_size,
+                    )
+                    for token, symbol, strike, opt_type, opt_type_short, lot_size in zip(
+                        tokens, symbols, strikes, opt_types, opt_types_short, lot_sizes
+                    )
+                })
+                tokens_by_underlying.setdefault(underlying, []).extend(tokens)
+
+        # Publish the finished build in one go
+        self._tokens_list = list(universe)
+        self._tokens_array = np.array(self._tokens_list, dtype=np.int64)
+        self._universe = universe
+        self._universe_view = MappingProxyType(universe)
+        self._selected_expiries = selected_expiries
+        self._tokens_by_underlying = tokens_by_underlying
+        self._last_build_signature = signature
+
+        logger.info(f"Built universe with {len(universe)} option contracts")
+        return self.get_universe()
 
     def get_tokens(self) -> List[int]:
-        """Get list of all instrument tokens in universe."""
-        return list(self._universe.keys())
+        """
+        Get list of all instrument tokens in universe.
 
-    def get_universe(self) -> Dict[int, Dict[str, Any]]:
-        """Get the full universe dictionary."""
-        return self._universe
+        The list is cached per build and shared; callers must not mutate it.
+        """
+        return self._tokens_list
+
+    def get_tokens_array(self) -> np.ndarray:
+        """Get all instrument tokens in universe as an int64 array (cached per build)."""
+        return self._tokens_array
+
+    def get_universe(self) -> Mapping[int, ContractMeta]:
+        """
+        Get a read-only view of the full universe.
+
+        The view is of the universe as of the last build; build_universe
+        publishes a new mapping, so fetch the view again after rebuilding.
+        The same view object is returned until the next build.
+        """
+        return self._universe_view
+
+    def get_universe_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Get the universe as aligned NumPy arrays, in universe token order.
+
+        Keys:
+            tokens: int64 instrument tokens.
+            strike: float64 strikes.
+            underlying_idx: int8 index into get_underlyings().
+            opt_type_code: int8, 0 for CE and 1 for PE.
 
-    def get_contract_meta(self, token: int) -> Optional[Dict[str, Any]]:
+        Built on first use after each build_universe and shared between
+        callers, so treat the arrays as read-only.
+        """
+        return self._get_projection()[1]
+
+    def get_token_index(self) -> Dict[int, int]:
+        """Get the token -> row mapping for get_universe_arrays()."""
+        return self._get_projection()[2]
+
+    def _get_projection(
+        self,
+    ) -> Tuple[Dict[int, ContractMeta], Dict[str, np.ndarray], Dict[int, int]]:
+        """Array projection of the current universe, rebuilt after each build."""
+        universe = self._universe
+        projection = self._projection
+        if projection is not None and projection[0] is universe:
+            return projection
+
+        metas = list(universe.values())
+        underlying_idx = {u: i for i, u in enumerate(self.underlyings)}
+        arrays = {
+            "tokens": np.fromiter(universe, dtype=np.int64, count=len(metas)),
+            "strike": np.array([m.strike for m in metas], dtype=np.float64),
+            "underlying_idx": np.array(
+                [underlying_idx[m.underlying] for m in metas], dtype=np.int8
+            ),
+            "opt_type_code": np.array(
+                [m.option_type != "CE" for m in metas], dtype=np.int8
+            ),
+        }
+        token_to_idx = {token: i for i, token in enumerate(universe)}
+        projection = (universe, arrays, token_to_idx)
+        self._projection = projection
+        return projection
+
+    def get_contract_meta(self, token: int) -> Optional[ContractMeta]:
         """Get metadata for a specific token."""
         return self._universe.get(token)
 
@@ -226,32 +399,44 @@ class OptionUniverse:
     def refresh_universe(
         self,
         spot_prices: Optional[Dict[str, float]] = None,
-    ) -> Dict[int, Dict[str, Any]]:
+    ) -> Mapping[int, ContractMeta]:
         """
         Refresh the universe (e.g., when spot price changes significantly).
 
+        Rebuilds only if spot prices, the trading day or the selection
+        settings changed since the last build.
+
         Args:
             spot_prices: Updated spot prices.
 
         Returns:
-            Updated universe dictionary.
+            Read-only view of the updated universe.
         """
-        return self.build_universe(spot_prices)
+        if spot_prices:
+            self._spot_prices.update(spot_prices)
+        if self._build_signature() == self._last_build_signature:
+            logger.debug("Universe inputs unchanged, skipping rebuild")
+            return self.get_universe()
+        return self.build_universe()
 
     def get_tokens_by_underlying(self, underlying: str) -> List[int]:
         """Get tokens for a specific underlying."""
-        return [
-            token for token, meta in self._universe.items()
-            if meta["underlying"] == underlying
-        ]
+        return list(self._tokens_by_underlying.get(underlying, []))
+
+    def summary_counts_only(self) -> Dict[str, int]:
+        """Get the contract count per underlying."""
+        return {
+            underlying: len(self._tokens_by_underlying.get(underlying, ()))
+            for underlying in self.underlyings
+        }
 
     def summary(self) -> str:
         """Get a summary string of the universe."""
         lines = [f"Option Universe: {len(self._universe)} contracts"]
         for underlying in self.underlyings:
-            tokens = self.get_tokens_by_underlying(underlying)
+            n_tokens = len(self._tokens_by_underlying.get(underlying, []))
             expiries = self._selected_expiries.get(underlying, [])
-            lines.append(f"  {underlying}: {len(tokens)} contracts, expiries: {expiries}")
+            lines.append(f"  {underlying}: {n_tokens} contracts, expiries: {expiries}")
         return "\n".join(lines)
 
 
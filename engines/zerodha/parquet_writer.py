@@ -0,0 +1,159 @@
+"""
+Buffered Parquet Writer
+
+Columnar alternative to the CSV writer, selected with output_format: parquet.
+
+Handles:
+- One Parquet file per underlying per day, same naming as the CSV output
+- Fixed schema matching the CSV columns
+- One row group per flush, written by the background writer thread
+- Daily file rollover
+"""
+
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from engines.zerodha.csv_writer import SCHEMA, CSVWriter, MultiCSVWriter, _columns_to_table
+
+logger = logging.getLogger(__name__)
+
+
+def _rows_to_table(rows: List[Any]) -> pa.Table:
+    """Convert row tuples in COLUMNS order, or row dictionaries, to an Arrow table."""
+    if not isinstance(rows[0], tuple):
+        return pa.Table.from_pylist(rows, schema=SCHEMA)
+    return pa.Table.from_arrays(
+        [
+            pa.array(values, type=field.type)
+            for field, values in zip(SCHEMA, zip(*rows))
+        ],
+        schema=SCHEMA,
+    )
+
+
+class ParquetWriter(CSVWriter):
+    """
+    Buffered Parquet writer with rollover support.
+
+    Reuses CSVWriter's queueing, writer thread and rollover; only the file
+    format differs. Parquet files cannot be appended to once closed, so a
+    restart on the same day writes a numbered part file next to the first.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        underlying: str,
+        venue: str = "NSEFO",
+        flush_rows: int = 500,
+        flush_interval_seconds: float = 1.0,
+        compression: str = "zstd",
+    ):
+        """
+        Initialize ParquetWriter.
+
+        Args:
+            output_dir: Directory to write Parquet files.
+            underlying: Underlying symbol (e.g., "NIFTY").
+            venue: Venue token for filename (e.g., "NSEFO").
+            flush_rows: Flush buffer after this many rows.
+            flush_interval_seconds: Maximum time between flushes.
+            compression: Parquet compression codec.
+        """
+        self.compression = compression
+        self._pq_writer: Optional[pq.ParquetWriter] = None
+        # 0 for the day's first file, n for the nth restart's part file
+        self._part: int = 0
+        super().__init__(
+            output_dir=output_dir,
+            underlying=underlying,
+            venue=venue,
+            flush_rows=flush_rows,
+            flush_interval_seconds=flush_interval_seconds,
+        )
+
+    def _get_filename(self, start_date: date, end_date: Optional[date] = None) -> str:
+        """
+        Generate filename following SHUNYA convention.
+
+        Format: {UNDERLYING}_NSEFO_OPTION_CHAIN_1S_{START_YYYYMMDD}_{END_YYYYMMDD}[_partN].parquet
+        """
+        stem = super()._get_filename(start_date, end_date)[: -len(".csv")]
+        if self._part:
+            stem = f"{stem}_part{self._part}"
+        return f"{stem}.parquet"
+
+    def _is_open(self) -> bool:
+        """Whether an output file is currently open."""
+        return self._pq_writer is not None
+
+    def _open_file(self, for_date: date) -> None:
+        """Open a new file for writing."""
+        self._close_file()
+
+        self._set_start_date(for_date)
+        self._part = 0
+        while (self.output_dir / self._get_filename(for_date)).exists():
+            self._part += 1
+        self._current_file = self.output_dir / self._get_filename(for_date)
+
+        self._pq_writer = pq.ParquetWriter(
+            self._current_file, SCHEMA, compression=self.compression
+        )
+        logger.info(f"Created new file: {self._current_file}")
+
+    def _close_file(self) -> None:
+        """Close the current file, writing the Parquet footer."""
+        if self._pq_writer is not None:
+            try:
+                self._pq_writer.close()
+            except Exception as e:
+                logger.error(f"Error closing file: {e}")
+            finally:
+                self._pq_writer = None
+
+    def _write_buffer(self) -> None:
+        """Write the buffered tables to the open file as one row group."""
+        self._pq_writer.write_table(pa.concat_tables(self._buffer))
+
+    def write_row(self, row: Any) -> None:
+        """
+        Queue a row for writing.
+
+        Args:
+            row: Row tuple in COLUMNS order, or dictionary of column values.
+        """
+        self.write_rows([row])
+
+    def write_rows(self, rows: List[Any]) -> None:
+        """
+        Queue multiple rows for writing.
+
+        Args:
+            rows: List of row tuples or dictionaries.
+        """
+        if rows:
+            self._enqueue(_rows_to_table(rows))
+
+    def write_columns(self, cols: Dict[str, np.ndarray]) -> None:
+        """
+        Queue a columnar snapshot for writing.
+
+        Args:
+            cols: Column arrays from SnapshotBuilder.build_snapshot_columns.
+        """
+        table = _columns_to_table(cols)
+        if table.num_rows:
+            self._enqueue(table)
+
+
+class MultiParquetWriter(MultiCSVWriter):
+    """Manages multiple Parquet writers, one per underlying."""
+
+    writer_class = ParquetWriter
@@ -3,7 +3,7 @@
 Zerodha Option Chain Streamer - Main Orchestrator
 
 Streams live options data from Kite Connect WebSocket and saves
-1-second option-chain snapshots to CSV.
+1-second option-chain snapshots to CSV (or Parquet).
 
 Usage:
     python -m engines.zerodha.run_option_chain [--config CONFIG_PATH] [--login]
@@ -18,7 +18,7 @@ import threading
 import time
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional, Set
 
 import yaml
 from dotenv import load_dotenv
@@ -33,6 +33,7 @@ from engines.zerodha.option_universe import OptionUniverse
 from engines.zerodha.ticker_stream import TickerStream, MultiTickerStream
 from engines.zerodha.snapshot_builder import SnapshotBuilder
 from engines.zerodha.csv_writer import MultiCSVWriter
+from engines.zerodha.parquet_writer import MultiParquetWriter
 
 
 def setup_logging(log_dir: Path, log_level: str = "INFO") -> None:
@@ -82,6 +83,14 @@ def load_config(config_path: Path) -> Dict[str, Any]:
     return config
 
 
+# Map underlying to its index instrument for spot quotes
+INDEX_QUOTE_KEYS = {
+    "NIFTY": "NSE:NIFTY 50",
+    "BANKNIFTY": "NSE:NIFTY BANK",
+    "FINNIFTY": "NSE:NIFTY FIN SERVICE",
+}
+
+
 class OptionChainStreamer:
     """Main orchestrator for option chain streaming."""
 
@@ -108,9 +117,29 @@ class OptionChainStreamer:
         self.builder: Optional[SnapshotBuilder] = None
         self.writer: Optional[MultiCSVWriter] = None
 
+        # Read-only universe view handed to the builder each snapshot; replaced
+        # whenever the universe is (re)built
+        self._universe_snapshot: Mapping[int, Any] = {}
+        # Tokens currently subscribed on the ticker
+        self._subscribed_tokens: Set[int] = set()
+        # Skip snapshots for intervals in which no tick arrived
+        self._skip_idle_snapshots = bool(self.config.get("skip_idle_snapshots", False))
+        # Write only contracts that ticked since the previous snapshot, with a
+        # full snapshot every full_snapshot_every snapshots
+        self._changed_rows_only = bool(self.config.get("changed_rows_only", False))
+        self._full_snapshot_every = max(1, int(self.config.get("full_snapshot_every", 60)))
+
+        # Quote keys for the configured underlyings that have an index
+        self._index_keys: Dict[str, str] = {
+            u: INDEX_QUOTE_KEYS[u]
+            for u in self.config.get("underlyings", [])
+            if u in INDEX_QUOTE_KEYS
+        }
+
         # Stats
         self._stats = {
             "snapshots_taken": 0,
+            "snapshots_skipped": 0,
             "rows_written": 0,
             "start_time": None,
             "last_snapshot_time": None,
@@ -147,8 +176,8 @@ class OptionChainStreamer:
 
         # Get initial spot prices from index quotes
         spot_prices = self._fetch_spot_prices(kite)
-        self.universe.build_universe(spot_prices)
-        self.logger.info(self.universe.summary())
+        self._universe_snapshot = self.universe.build_universe(spot_prices)
+        self._log_universe()
 
         # Ticker
         tokens = self.universe.get_tokens()
@@ -170,6 +199,7 @@ class OptionChainStreamer:
                 reconnect_max_delay=self.config.get("reconnect_max_delay", 30),
             )
         self.ticker.set_tokens(tokens)
+        self._subscribed_tokens = set(tokens)
         self.logger.info(f"Ticker configured with {len(tokens)} tokens")
 
         # Snapshot builder
@@ -179,46 +209,96 @@ class OptionChainStreamer:
         )
         for underlying, spot in spot_prices.items():
             self.builder.set_spot_price(underlying, spot)
+        self.builder.set_universe(self._universe_snapshot)
 
-        # CSV writer
+        # Output writer
         output_dir = self.base_path / self.config.get("output_dir", "archive/option_chain")
-        self.writer = MultiCSVWriter(
+        output_format = self.config.get("output_format", "csv")
+        if output_format == "parquet":
+            writer_class = MultiParquetWriter
+        else:
+            if output_format != "csv":
+                self.logger.warning(f"Unknown output_format: {output_format}, defaulting to csv")
+                output_format = "csv"
+            writer_class = MultiCSVWriter
+        self.writer = writer_class(
             output_dir=output_dir,
             underlyings=self.config.get("underlyings", ["NIFTY"]),
             venue="NSEFO",
             flush_rows=self.config.get("flush_rows_per_write", 500),
             flush_interval_seconds=1.0,
         )
-        self.logger.info(f"CSV writer initialized, output dir: {output_dir}")
+        self.logger.info(f"{output_format.upper()} writer initialized, output dir: {output_dir}")
 
     def _fetch_spot_prices(self, kite) -> Dict[str, float]:
         """Fetch current spot prices for underlyings."""
         spot_prices = {}
-        underlyings = self.config.get("underlyings", [])
-
-        # Map underlying to index instrument
-        index_map = {
-            "NIFTY": "NSE:NIFTY 50",
-            "BANKNIFTY": "NSE:NIFTY BANK",
-            "FINNIFTY": "NSE:NIFTY FIN SERVICE",
-        }
-
-        instruments = [index_map.get(u) for u in underlyings if u in index_map]
-        instruments = [i for i in instruments if i]
 
-        if instruments:
+        if self._index_keys:
             try:
-                quotes = kite.quote(instruments)
-                for underlying in underlyings:
-                    key = index_map.get(underlying)
-                    if key and key in quotes:
-                        spot_prices[underlying] = quotes[key].get("last_price", 0)
-                        self.logger.info(f"{underlying} spot: {spot_prices[underlying]}")
+                quotes = kite.quote(list(self._index_keys.values()))
+                spot_prices = {
+                    u: quotes[key].get("last_price", 0)
+                    for u, key in self._index_keys.items()
+                    if key in quotes
+                }
+                for underlying, spot in spot_prices.items():
+                    self.logger.info(f"{underlying} spot: {spot}")
             except Exception as e:
                 self.logger.error(f"Error fetching spot prices: {e}")
 
         return spot_prices
 
+    def refresh_universe(self, spot_prices: Optional[Dict[str, float]] = None) -> None:
+        """
+        Refresh the universe and move the ticker onto its tokens.
+
+        Only the difference from the current subscription is sent, so
+        contracts present before and after keep streaming uninterrupted.
+
+        Args:
+            spot_prices: Updated spot prices.
+        """
+        if not self.universe or not self.ticker or not self.builder:
+            return
+
+        if spot_prices:
+            for underlying, spot in spot_prices.items():
+                self.builder.set_spot_price(underlying, spot)
+
+        universe = self.universe.refresh_universe(spot_prices)
+        tokens = self.universe.get_tokens()
+        # Unchanged inputs return the same view, so identity means no rebuild;
+        # the subscription is only a subset of it if tokens were dropped at
+        # the connection limit, which are retried below
+        rebuilt = universe is not self._universe_snapshot
+        if not rebuilt and len(self._subscribed_tokens) == len(tokens):
+            return
+        if rebuilt:
+            self.builder.set_universe(universe)
+            self._universe_snapshot = universe
+
+        new_tokens = set(tokens)
+        added = new_tokens - self._subscribed_tokens
+        removed = self._subscribed_tokens - new_tokens
+        # Free the outgoing tokens' room before taking on new ones
+        if removed:
+            self.ticker.unsubscribe(list(removed))
+        accepted = self.ticker.subscribe(list(added)) if added else []
+        self._subscribed_tokens = (self._subscribed_tokens - removed).union(accepted)
+        self.logger.info(
+            "Universe refreshed: %d of %d tokens subscribed (+%d / -%d)",
+            len(self._subscribed_tokens), len(new_tokens), len(accepted), len(removed),
+        )
+        if rebuilt:
+            self._log_universe()
+
+    def _log_universe(self) -> None:
+        """Log per-underlying contract counts; the full summary only at DEBUG."""
+        self.logger.info("Universe contracts per underlying: %s", self.universe.summary_counts_only())
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(self.universe.summary())
+
     def _update_spot_prices(self) -> None:
         """Update spot prices from latest ticks or quotes."""
         # For now, we keep initial spot prices
@@ -226,58 +306,77 @@ class OptionChainStreamer:
         pass
 
     def _take_snapshot(self) -> None:
-        """Take a snapshot of current state and write to CSV."""
+        """Take a snapshot of current state and write it out."""
         if not self.ticker or not self.universe or not self.builder or not self.writer:
             return
 
-        ticks = self.ticker.get_all_latest_ticks()
-        universe = self.universe.get_universe()
+        # With skip_idle_snapshots, an interval without ticks repeats the
+        # previous snapshot's data, so it is not written again
+        if self._skip_idle_snapshots and not self.ticker.has_new_ticks():
+            self._stats["snapshots_skipped"] += 1
+            return
+
+        # Live read-only view: the builder only does per-token lookups, so
+        # there is no need to copy every tick each second
+        ticks = self.ticker.get_latest_ticks_view()
 
         if not ticks:
             self.logger.debug("No ticks available for snapshot")
             return
 
-        # Build snapshot rows
-        rows = self.builder.build_snapshot(ticks, universe)
-
-        # Write to CSV
-        self.writer.write_rows(rows)
+        dirty_tokens = None
+        if self._changed_rows_only:
+            dirty_tokens = self.ticker.pop_dirty()
+            if self._stats["snapshots_taken"] % self._full_snapshot_every == 0:
+                dirty_tokens = None
+            elif not dirty_tokens:
+                self._stats["snapshots_skipped"] += 1
+                return
+
+        # Both writers take the snapshot column-wise; cell formatting happens
+        # on their writer threads
+        cols = self.builder.build_snapshot_columns(ticks, dirty_tokens=dirty_tokens)
+        self.writer.write_columns(cols)
+        n_rows = len(cols["ts"])
 
         self._stats["snapshots_taken"] += 1
-        self._stats["rows_written"] += len(rows)
+        self._stats["rows_written"] += n_rows
         self._stats["last_snapshot_time"] = datetime.now()
 
         if self._stats["snapshots_taken"] % 60 == 0:
             self.logger.info(
-                f"Stats: {self._stats['snapshots_taken']} snapshots, "
-                f"{self._stats['rows_written']} rows written"
+                "Stats: %d snapshots, %d rows written",
+                self._stats["snapshots_taken"], self._stats["rows_written"],
             )
 
     def _snapshot_loop(self) -> None:
-        """Main loop for taking periodic snapshots."""
+        """
+        Main loop for taking periodic snapshots.
+
+        Snapshots are scheduled on the monotonic clock at start + k * interval,
+        so wall-clock adjustments and time spent snapshotting do not accumulate
+        as drift. Between snapshots the loop blocks on the shutdown event for
+        exactly the remaining time.
+        """
         interval = self.config.get("sampling_interval_seconds", 1)
-        next_snapshot = time.time() + interval
+        start = time.monotonic()
+        k = 1
 
         while self._running and not self._shutdown_event.is_set():
-            now = time.time()
+            target = start + k * interval
+            now = time.monotonic()
 
-            if now >= next_snapshot:
-                try:
-                    self._take_snapshot()
-                except Exception as e:
-                    self.logger.error(f"Error taking snapshot: {e}")
+            if now < target:
+                self._shutdown_event.wait(target - now)
+                continue
 
-                # Schedule next snapshot
-                next_snapshot = now + interval
-
-            # Also check for time-based flush
-            if self.writer:
-                self.writer.check_time_flush()
+            try:
+                self._take_snapshot()
+            except Exception as e:
+                self.logger.error(f"Error taking snapshot: {e}")
 
-            # Sleep until next snapshot (with small intervals for shutdown check)
-            sleep_time = min(0.1, next_snapshot - time.time())
-            if sleep_time > 0:
-                self._shutdown_event.wait(sleep_time)
+            # Schedule next snapshot, skipping any slots missed while behind
+            k = max(k + 1, int((time.monotonic() - start) // interval) + 1)
 
     def run(self) -> None:
         """Start streaming and snapshot loop."""
@@ -12,12 +12,18 @@ bid_px_2, bid_sz_2, bid_px_3, bid_sz_3, ask_px_1, ask_sz_1, ask_px_2, ask_sz_2,
 ask_px_3, ask_sz_3
 """
 
+import collections
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import AbstractSet, Dict, List, Mapping, Optional, Any, Sequence, Tuple
 
+import numpy as np
 import pytz
 
+from engines.zerodha.option_universe import ContractMeta
+
 logger = logging.getLogger(__name__)
 
 # Column order matching sample.csv
@@ -53,6 +59,43 @@ COLUMNS = [
     "ask_sz_3",
 ]
 
+# Named view of a build_row tuple, for callers that want field access
+Row = collections.namedtuple("Row", COLUMNS)
+
+# Columnar snapshot dtypes. Prices are float64 with NaN for missing values;
+# sizes are float64 as well (NaN needs a float) and are integral otherwise.
+# Every other column is an object array of Python values.
+FLOAT_COLUMNS = tuple(
+    col for col in COLUMNS
+    if "_px" in col or col in ("underlying_spot", "strike", "spread")
+)
+SIZE_COLUMNS = tuple(col for col in COLUMNS if "_sz" in col)
+
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=pytz.UTC)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# SnapshotBuilder._tick_values for a contract with no tick yet
+_NO_TICK_VALUES = (None,) * 12 + (None, 0)
+# Stand-ins for a missing tick, a missing depth dict and a missing depth level
+_NO_TICK: Dict[str, Any] = {}
+_NO_DEPTH: Dict[str, Any] = {}
+_NO_LEVEL: Dict[str, Any] = {}
+
+
+def _ticks_in_order(
+    ticks: Mapping[int, Dict[str, Any]],
+    tokens: List[int],
+) -> Sequence[Optional[Dict[str, Any]]]:
+    """
+    Latest tick, or None, for each token. Uses the tick store's own
+    ticks_in_order when it has one (TickerStream's live view), which reads
+    slots in a cached order instead of looking up every token.
+    """
+    in_order = getattr(ticks, "ticks_in_order", None)
+    if in_order is not None:
+        return in_order(tokens)
+    return list(map(ticks.get, tokens))
+
 
 class SnapshotBuilder:
     """Builds normalized snapshots from raw tick data."""
@@ -69,12 +112,60 @@ class SnapshotBuilder:
             venue_label: Venue string for output (e.g., "NSE-FO").
             timezone: Timezone for timestamp conversion.
         """
-        self.venue_label = venue_label
+        self.venue_label = sys.intern(venue_label)
         self.tz = pytz.timezone(timezone)
 
         # underlying -> latest spot price
         self._spot_prices: Dict[str, float] = {}
 
+        # Static per-contract columns and join order for build_snapshot_columns,
+        # precomputed by set_universe
+        self._universe_tokens: List[int] = []
+        self._universe_columns: Dict[str, np.ndarray] = {}
+
+    def set_universe(self, universe: Mapping[int, ContractMeta]) -> None:
+        """
+        Precompute the static columns of a universe for build_snapshot_columns.
+
+        Call again whenever the universe is rebuilt.
+        """
+        self._universe_tokens, self._universe_columns = self._static_columns(universe)
+
+    @staticmethod
+    def _static_columns(
+        universe: Mapping[int, ContractMeta],
+    ) -> Tuple[List[int], Dict[str, np.ndarray]]:
+        """Token order and per-contract columns that do not change between ticks."""
+        metas = list(universe.values())
+        underlyings = [m.underlying for m in metas]
+        # Spot is per underlying: keep codes so a snapshot looks each one up once
+        names, codes = np.unique(np.array(underlyings, dtype=object), return_inverse=True)
+        return list(universe), {
+            "underlying_symbol": np.array(underlyings, dtype=object),
+            "instrument_id": np.array([m.instrument_id for m in metas], dtype=object),
+            "option_symbol": np.array([m.tradingsymbol for m in metas], dtype=object),
+            "expiry_date": np.array([m.expiry for m in metas], dtype=object),
+            "strike": np.array([m.strike for m in metas], dtype=np.float64),
+            "option_type": np.array([m.option_type_short for m in metas], dtype=object),
+            "underlying_names": names,
+            "underlying_codes": codes.reshape(-1),
+        }
+
+    @staticmethod
+    def _select_rows(
+        tokens: List[int],
+        static: Dict[str, np.ndarray],
+        selected: AbstractSet[int],
+    ) -> Tuple[List[int], Dict[str, np.ndarray]]:
+        """Restrict tokens and static columns to the selected tokens, keeping universe order."""
+        positions = [i for i, token in enumerate(tokens) if token in selected]
+        index = np.array(positions, dtype=np.intp)
+        subset = {
+            col: values if col == "underlying_names" else values[index]
+            for col, values in static.items()
+        }
+        return [tokens[i] for i in positions], subset
+
     def set_spot_price(self, underlying: str, spot: float) -> None:
         """Update spot price for an underlying."""
         self._spot_prices[underlying] = spot
@@ -94,72 +185,19 @@ class SnapshotBuilder:
             Microseconds since epoch.
         """
         if dt is None:
-            dt = datetime.now(self.tz)
-        elif dt.tzinfo is None:
+            return time.time_ns() // 1000
+        if dt.tzinfo is None:
             dt = self.tz.localize(dt)
 
-        epoch = datetime(1970, 1, 1, tzinfo=pytz.UTC)
-        delta = dt.astimezone(pytz.UTC) - epoch
-        return int(delta.total_seconds() * 1_000_000)
-
-    def _extract_depth(
-        self,
-        tick: Dict[str, Any],
-        side: str,
-        levels: int = 3,
-    ) -> List[Tuple[Optional[float], Optional[int]]]:
-        """
-        Extract bid/ask depth from tick.
-
-        Args:
-            tick: Raw tick data.
-            side: "buy" for bids, "sell" for asks.
-            levels: Number of levels to extract.
-
-        Returns:
-            List of (price, quantity) tuples.
-        """
-        depth = tick.get("depth", {}).get(side, [])
-        result = []
-
-        for i in range(levels):
-            if i < len(depth):
-                level = depth[i]
-                price = level.get("price")
-                qty = level.get("quantity")
-                # Convert 0 price to None for empty levels
-                if price == 0:
-                    price = None
-                    qty = None
-                result.append((price, qty))
-            else:
-                result.append((None, None))
-
-        return result
-
-    def _compute_mid_spread(
-        self,
-        best_bid: Optional[float],
-        best_ask: Optional[float],
-    ) -> Tuple[Optional[float], Optional[float]]:
-        """
-        Compute mid price and spread.
-
-        Returns:
-            (mid_px, spread) tuple.
-        """
-        if best_bid is not None and best_ask is not None:
-            mid = (best_bid + best_ask) / 2
-            spread = best_ask - best_bid
-            return mid, spread
-        return None, None
+        # Aware datetime subtraction handles the offset; no astimezone needed
+        return (dt - _EPOCH_UTC) // _ONE_MICROSECOND
 
     def build_row(
         self,
         tick: Dict[str, Any],
-        contract_meta: Dict[str, Any],
+        contract_meta: ContractMeta,
         ts_micros: Optional[int] = None,
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Any, ...]:
         """
         Build a single snapshot row from tick and metadata.
 
@@ -169,9 +207,12 @@ class SnapshotBuilder:
             ts_micros: Optional timestamp in microseconds. Uses current time if None.
 
         Returns:
-            Dictionary with column values.
+            Tuple of column values in COLUMNS order (wrap in Row for named access).
         """
-        underlying = contract_meta.get("underlying", "")
+        # ContractMeta is the per-token static record, built once with the
+        # universe; its slot reads cost the same as splicing a precomputed
+        # tuple prefix into each row, so the row is assembled directly
+        underlying = contract_meta.underlying
         spot = self._spot_prices.get(underlying)
 
         # Timestamp
@@ -183,107 +224,260 @@ class SnapshotBuilder:
             else:
                 ts_micros = self._ts_to_micros()
 
-        # Extract depth
-        bids = self._extract_depth(tick, "buy", 3)
-        asks = self._extract_depth(tick, "sell", 3)
-
-        # Best bid/ask
-        best_bid_px = bids[0][0] if bids else None
-        best_bid_sz = bids[0][1] if bids else None
-        best_ask_px = asks[0][0] if asks else None
-        best_ask_sz = asks[0][1] if asks else None
-
-        # Mid and spread
-        mid_px, spread = self._compute_mid_spread(best_bid_px, best_ask_px)
-
-        # Last trade
-        last_trade_px = tick.get("last_price")
-        last_trade_sz = tick.get("last_quantity", 0)
-
-        # Build row
-        row = {
-            "ts": ts_micros,
-            "venue": self.venue_label,
-            "underlying_symbol": underlying,
-            "underlying_spot": spot,
-            "instrument_id": contract_meta.get("instrument_id", ""),
-            "option_symbol": contract_meta.get("tradingsymbol", ""),
-            "expiry_date": contract_meta.get("expiry", ""),
-            "strike": contract_meta.get("strike"),
-            "option_type": contract_meta.get("option_type_short", ""),
-            "best_bid_px": best_bid_px,
-            "best_bid_sz": best_bid_sz,
-            "best_ask_px": best_ask_px,
-            "best_ask_sz": best_ask_sz,
-            "mid_px": mid_px,
-            "spread": spread,
-            "last_trade_px": last_trade_px,
-            "last_trade_sz": last_trade_sz,
+        # Depth and last trade unrolled in one call (see _tick_values)
+        (
+            bid_px_1, bid_px_2, bid_px_3, bid_sz_1, bid_sz_2, bid_sz_3,
+            ask_px_1, ask_px_2, ask_px_3, ask_sz_1, ask_sz_2, ask_sz_3,
+            last_trade_px, last_trade_sz,
+        ) = self._tick_values(tick)
+
+        # A 0 price marks an empty level: blank both price and size
+        if bid_px_1 == 0:
+            bid_px_1 = bid_sz_1 = None
+        if bid_px_2 == 0:
+            bid_px_2 = bid_sz_2 = None
+        if bid_px_3 == 0:
+            bid_px_3 = bid_sz_3 = None
+        if ask_px_1 == 0:
+            ask_px_1 = ask_sz_1 = None
+        if ask_px_2 == 0:
+            ask_px_2 = ask_sz_2 = None
+        if ask_px_3 == 0:
+            ask_px_3 = ask_sz_3 = None
+
+        # Mid and spread need both sides of the top level
+        if bid_px_1 is not None and ask_px_1 is not None:
+            mid_px = (bid_px_1 + ask_px_1) / 2
+            spread = ask_px_1 - bid_px_1
+        else:
+            mid_px = spread = None
+
+        # Build row, in COLUMNS order
+        return (
+            ts_micros,
+            self.venue_label,
+            underlying,
+            spot,
+            contract_meta.instrument_id,
+            contract_meta.tradingsymbol,
+            contract_meta.expiry,
+            contract_meta.strike,
+            contract_meta.option_type_short,
+            bid_px_1,
+            bid_sz_1,
+            ask_px_1,
+            ask_sz_1,
+            mid_px,
+            spread,
+            last_trade_px,
+            last_trade_sz,
             # Bid levels
-            "bid_px_1": bids[0][0] if len(bids) > 0 else None,
-            "bid_sz_1": bids[0][1] if len(bids) > 0 else None,
-            "bid_px_2": bids[1][0] if len(bids) > 1 else None,
-            "bid_sz_2": bids[1][1] if len(bids) > 1 else None,
-            "bid_px_3": bids[2][0] if len(bids) > 2 else None,
-            "bid_sz_3": bids[2][1] if len(bids) > 2 else None,
+            bid_px_1,
+            bid_sz_1,
+            bid_px_2,
+            bid_sz_2,
+            bid_px_3,
+            bid_sz_3,
             # Ask levels
-            "ask_px_1": asks[0][0] if len(asks) > 0 else None,
-            "ask_sz_1": asks[0][1] if len(asks) > 0 else None,
-            "ask_px_2": asks[1][0] if len(asks) > 1 else None,
-            "ask_sz_2": asks[1][1] if len(asks) > 1 else None,
-            "ask_px_3": asks[2][0] if len(asks) > 2 else None,
-            "ask_sz_3": asks[2][1] if len(asks) > 2 else None,
-        }
-
-        return row
+            ask_px_1,
+            ask_sz_1,
+            ask_px_2,
+            ask_sz_2,
+            ask_px_3,
+            ask_sz_3,
+        )
+
+    def build_row_dict(
+        self,
+        tick: Dict[str, Any],
+        contract_meta: ContractMeta,
+        ts_micros: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Like build_row, but keyed by column name."""
+        return dict(zip(COLUMNS, self.build_row(tick, contract_meta, ts_micros)))
 
     def build_snapshot(
         self,
-        ticks: Dict[int, Dict[str, Any]],
-        universe: Dict[int, Dict[str, Any]],
+        ticks: Mapping[int, Dict[str, Any]],
+        universe: Mapping[int, ContractMeta],
         ts_micros: Optional[int] = None,
-    ) -> List[Dict[str, Any]]:
+        dirty_tokens: Optional[AbstractSet[int]] = None,
+    ) -> List[Tuple[Any, ...]]:
         """
-        Build a full snapshot from all current ticks.
+        Build a snapshot from the current ticks.
 
         Args:
             ticks: Dict mapping token -> latest tick.
-            universe: Dict mapping token -> contract metadata.
+            universe: Dict mapping token -> ContractMeta.
             ts_micros: Optional timestamp in microseconds.
+            dirty_tokens: If given, only build rows for these tokens (e.g.
+                from TickerStream.pop_dirty()); None builds the full snapshot.
 
         Returns:
-            List of row dictionaries.
+            List of row tuples in COLUMNS order, in universe order.
         """
         if ts_micros is None:
             ts_micros = self._ts_to_micros()
 
-        rows = []
-        for token, meta in universe.items():
-            tick = ticks.get(token, {})
-            row = self.build_row(tick, meta, ts_micros)
-            rows.append(row)
+        build_row = self.build_row
+        if dirty_tokens is not None:
+            return [
+                build_row(ticks.get(token, _NO_TICK), meta, ts_micros)
+                for token, meta in universe.items()
+                if token in dirty_tokens
+            ]
+        return [
+            build_row(ticks.get(token, _NO_TICK), meta, ts_micros)
+            for token, meta in universe.items()
+        ]
 
-        return rows
+    @staticmethod
+    def _tick_values(tick: Dict[str, Any]) -> Tuple[Any, ...]:
+        """
+        Raw numeric fields of a tick in block layout: bid px x3, bid sz x3,
+        ask px x3, ask sz x3, last trade px, last trade sz.
 
-    def format_row_for_csv(self, row: Dict[str, Any]) -> List[Any]:
+        Depth levels are copied as sent, including zero-price placeholders;
+        build_snapshot_columns masks those for all rows at once.
+        """
+        depth = tick.get("depth") or _NO_DEPTH
+        buy = depth.get("buy") or ()
+        sell = depth.get("sell") or ()
+        n_buy = len(buy)
+        n_sell = len(sell)
+        b1 = buy[0] if n_buy > 0 else _NO_LEVEL
+        b2 = buy[1] if n_buy > 1 else _NO_LEVEL
+        b3 = buy[2] if n_buy > 2 else _NO_LEVEL
+        a1 = sell[0] if n_sell > 0 else _NO_LEVEL
+        a2 = sell[1] if n_sell > 1 else _NO_LEVEL
+        a3 = sell[2] if n_sell > 2 else _NO_LEVEL
+        return (
+            b1.get("price"), b2.get("price"), b3.get("price"),
+            b1.get("quantity"), b2.get("quantity"), b3.get("quantity"),
+            a1.get("price"), a2.get("price"), a3.get("price"),
+            a1.get("quantity"), a2.get("quantity"), a3.get("quantity"),
+            tick.get("last_price"), tick.get("last_quantity", 0),
+        )
+
+    def build_snapshot_columns(
+        self,
+        ticks: Mapping[int, Dict[str, Any]],
+        universe: Optional[Mapping[int, ContractMeta]] = None,
+        ts_micros: Optional[int] = None,
+        dirty_tokens: Optional[AbstractSet[int]] = None,
+    ) -> Dict[str, np.ndarray]:
         """
-        Format a row dictionary for CSV writing.
+        Build a full snapshot as columns rather than row dictionaries.
+
+        Same values as build_snapshot, laid out as one array per column (see
+        FLOAT_COLUMNS and SIZE_COLUMNS for dtypes), so the writer can
+        serialize the snapshot without touching each row in Python. Numeric
+        tick columns are views into a single block filled in one conversion.
+        Contract columns come from set_universe, leaving only the join of
+        ticks onto the universe's token order to do per snapshot.
 
         Args:
-            row: Row dictionary.
+            ticks: Dict mapping token -> latest tick.
+            universe: Dict mapping token -> ContractMeta. Defaults to the
+                universe given to set_universe.
+            ts_micros: Optional timestamp in microseconds.
+            dirty_tokens: If given, only include these tokens (e.g. from
+                TickerStream.pop_dirty()); None builds the full snapshot.
+
+        Returns:
+            Dict mapping column name -> array, in COLUMNS order.
+        """
+        if ts_micros is None:
+            ts_micros = self._ts_to_micros()
+
+        if universe is None:
+            tokens, static = self._universe_tokens, self._universe_columns
+        else:
+            tokens, static = self._static_columns(universe)
+
+        if dirty_tokens is not None:
+            tokens, static = self._select_rows(tokens, static, dirty_tokens)
+
+        n = len(tokens)
+        spot_prices = self._spot_prices
+        spot_by_code = np.array(
+            [spot_prices.get(name) for name in static["underlying_names"]],
+            dtype=np.float64,
+        )
+        # One flat tuple of numeric fields per contract (see _tick_values),
+        # converted to a single (n, 14) float64 block; None becomes NaN
+        tick_values = self._tick_values
+        block = np.array(
+            [
+                tick_values(tick) if tick else _NO_TICK_VALUES
+                for tick in _ticks_in_order(ticks, tokens)
+            ],
+            dtype=np.float64,
+        ).reshape(n, len(_NO_TICK_VALUES))
+        # Depth as [row, side (bid/ask), field (px/sz), level]; a view, since
+        # it only splits each row's first 12 fields
+        depth = block[:, :12].reshape(n, 2, 2, 3)
+        px = depth[:, :, 0]
+        sz = depth[:, :, 1]
+        bid_px, ask_px = px[:, 0], px[:, 1]
+        bid_sz, ask_sz = sz[:, 0], sz[:, 1]
+        last_px = block[:, 12]
+        last_sz = block[:, 13]
+
+        # A zero price marks an empty level: blank both price and size, as
+        # build_row does level by level, with one mask for both sides
+        empty = px == 0
+        np.copyto(px, np.nan, where=empty)
+        np.copyto(sz, np.nan, where=empty)
+
+        best_bid_px = bid_px[:, 0]
+        best_ask_px = ask_px[:, 0]
+
+        return {
+            "ts": np.full(n, ts_micros, dtype=np.int64),
+            "venue": np.full(n, self.venue_label, dtype=object),
+            "underlying_symbol": static["underlying_symbol"],
+            "underlying_spot": spot_by_code[static["underlying_codes"]],
+            "instrument_id": static["instrument_id"],
+            "option_symbol": static["option_symbol"],
+            "expiry_date": static["expiry_date"],
+            "strike": static["strike"],
+            "option_type": static["option_type"],
+            "best_bid_px": best_bid_px,
+            "best_bid_sz": bid_sz[:, 0],
+            "best_ask_px": best_ask_px,
+            "best_ask_sz": ask_sz[:, 0],
+            # NaN on either side propagates, matching None in build_row
+            "mid_px": (best_bid_px + best_ask_px) / 2,
+            "spread": best_ask_px - best_bid_px,
+            "last_trade_px": last_px,
+            "last_trade_sz": last_sz,
+            "bid_px_1": best_bid_px,
+            "bid_sz_1": bid_sz[:, 0],
+            "bid_px_2": bid_px[:, 1],
+            "bid_sz_2": bid_sz[:, 1],
+            "bid_px_3": bid_px[:, 2],
+            "bid_sz_3": bid_sz[:, 2],
+            "ask_px_1": best_ask_px,
+            "ask_sz_1": ask_sz[:, 0],
+            "ask_px_2": ask_px[:, 1],
+            "ask_sz_2": ask_sz[:, 1],
+            "ask_px_3": ask_px[:, 2],
+            "ask_sz_3": ask_sz[:, 2],
+        }
+
+    def format_row_for_csv(self, row: Tuple[Any, ...]) -> List[Any]:
+        """
+        Format a row for CSV writing.
+
+        Args:
+            row: Row tuple from build_row.
 
         Returns:
             List of values in column order.
         """
-        result = []
-        for col in COLUMNS:
-            val = row.get(col)
-            # Handle None values - leave empty for optional fields
-            if val is None:
-                result.append("")
-            else:
-                result.append(val)
-        return result
+        # Handle None values - leave empty for optional fields
+        return ["" if val is None else val for val in row]
 
     @staticmethod
     def get_header() -> List[str]:
@@ -301,3 +495,74 @@ def format_csv_value(val: Any) -> str:
             return str(int(val))
         return str(val)
     return str(val)
+
+
+def format_float_column(values: np.ndarray) -> List[str]:
+    """
+    Vectorised format_csv_value for a float64 column, NaN meaning missing.
+
+    Args:
+        values: Float column, e.g. from build_snapshot_columns.
+
+    Returns:
+        List with the same text as format_csv_value per cell, "" for NaN.
+    """
+    # tolist() unboxes in C and str(float) is the shortest round-trip repr;
+    # this beats numpy's astype(str), which is just as slow per cell
+    text = list(map(str, values.tolist()))
+    big = np.abs(values) > 1e10
+    if big.any():
+        # Rare: printed as ints rather than in exponent form
+        for i in np.flatnonzero(big).tolist():
+            text[i] = str(int(values[i]))
+    for i in np.flatnonzero(np.isnan(values)).tolist():
+        text[i] = ""
+    return text
+
+
+def format_int_column(values: np.ndarray) -> List[str]:
+    """
+    Vectorised format_csv_value for an integer column that may be NaN-padded
+    float64 (the size columns of build_snapshot_columns).
+
+    Returns:
+        List of the integer values as text, "" for NaN.
+    """
+    if values.dtype.kind in "iu":
+        return list(map(str, values.tolist()))
+    missing = np.isnan(values)
+    text = list(map(str, np.where(missing, 0, values).astype(np.int64).tolist()))
+    for i in np.flatnonzero(missing).tolist():
+        text[i] = ""
+    return text
+
+
+def format_snapshot_for_csv(cols: Dict[str, np.ndarray]) -> List[Tuple[str, ...]]:
+    """
+    Format a columnar snapshot into CSV rows, one column at a time.
+
+    Numeric columns go through the column formatters above; object
+    columns pass strings through and use format_csv_value for the rest.
+
+    Args:
+        cols: Column arrays from SnapshotBuilder.build_snapshot_columns.
+
+    Returns:
+        List of row tuples of strings, in COLUMNS order.
+    """
+    formatted = []
+    for col in COLUMNS:
+        values = cols[col]
+        if col in SIZE_COLUMNS or values.dtype.kind in "iu":
+            formatted.append(format_int_column(values))
+        elif values.dtype.kind == "f":
+            formatted.append(format_float_column(values))
+        else:
+            # Mostly str already; anything else (or NaN) via format_csv_value
+            formatted.append([
+                v if v.__class__ is str
+                else "" if v is None or v != v
+                else format_csv_value(v)
+                for v in values.tolist()
+            ])
+    return list(zip(*formatted))
@@ -8,20 +8,270 @@ Handles:
 - Reconnection and error handling
 """
 
+import collections.abc
 import logging
+import operator
+import struct
 import threading
+import time
 from datetime import datetime
-from typing import Callable, Dict, List, Optional, Any
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Any, Sequence, Set
 
+import numpy as np
 from kiteconnect import KiteTicker
+from kiteconnect.__version__ import __version__ as KITECONNECT_VERSION
 
 logger = logging.getLogger(__name__)
 
+# Full-mode quote packet: 16 header fields, then 5 bid and 5 ask depth
+# entries of (quantity, price, orders, 2 bytes padding); all big-endian
+_FULL_PACKET = struct.Struct(">16I" + "IIH2x" * 10)
+
+
+# kiteconnect releases whose full-mode packet layout and tick keys
+# _FastKiteTicker has been checked against; any other version uses the stock
+# parser, since _parse_binary is a private method that may change upstream
+VERIFIED_KITECONNECT_VERSIONS = frozenset({"5.2.2"})
+
+
+class _FastKiteTicker(KiteTicker):
+    """
+    KiteTicker that decodes full-mode quote packets with a single struct
+    unpack per packet rather than one slice-and-unpack per field. Produces
+    the same tick dictionaries; other packet types use KiteTicker's parser.
+    Only used with VERIFIED_KITECONNECT_VERSIONS (see _ticker_class).
+    """
+
+    def _parse_binary(self, bin):
+        data = []
+        for packet in self._split_packets(bin):
+            if len(packet) != _FULL_PACKET.size:
+                # Re-frame the single packet for the stock parser
+                data.extend(super()._parse_binary(struct.pack(">HH", 1, len(packet)) + packet))
+                continue
+
+            fields = _FULL_PACKET.unpack(packet)
+            instrument_token = fields[0]
+            segment = instrument_token & 0xff
+            if segment == self.EXCHANGE_MAP["cds"]:
+                divisor = 10000000.0
+            elif segment in (self.EXCHANGE_MAP["bcd"], self.EXCHANGE_MAP["nco"]):
+                divisor = 10000.0
+            else:
+                divisor = 100.0
+
+            last_price = fields[1] / divisor
+            close = fields[10] / divisor
+            try:
+                last_trade_time = datetime.fromtimestamp(fields[11])
+            except Exception:
+                last_trade_time = None
+            try:
+                timestamp = datetime.fromtimestamp(fields[15])
+            except Exception:
+                timestamp = None
+
+            levels = [
+                {"quantity": quantity, "price": price / divisor, "orders": orders}
+                for quantity, price, orders in zip(fields[16::3], fields[17::3], fields[18::3])
+            ]
+            data.append({
+                "tradable": segment != self.EXCHANGE_MAP["indices"],
+                "mode": self.MODE_FULL,
+                "instrument_token": instrument_token,
+                "last_price": last_price,
+                "last_traded_quantity": fields[2],
+                "average_traded_price": fields[3] / divisor,
+                "volume_traded": fields[4],
+                "total_buy_quantity": fields[5],
+                "total_sell_quantity": fields[6],
+                "ohlc": {
+                    "open": fields[7] / divisor,
+                    "high": fields[8] / divisor,
+                    "low": fields[9] / divisor,
+                    "close": close,
+                },
+                "change": (last_price - close) * 100 / close if close != 0 else 0,
+                "last_trade_time": last_trade_time,
+                "oi": fields[12],
+                "oi_day_high": fields[13],
+                "oi_day_low": fields[14],
+                "exchange_timestamp": timestamp,
+                "depth": {"buy": levels[:5], "sell": levels[5:]},
+            })
+
+        return data
+
+
+def _ticker_class() -> type:
+    """KiteTicker subclass to use with the installed kiteconnect."""
+    if KITECONNECT_VERSION in VERIFIED_KITECONNECT_VERSIONS:
+        return _FastKiteTicker
+    logger.info(
+        f"kiteconnect {KITECONNECT_VERSION} not verified for fast tick parsing, "
+        "using the stock parser"
+    )
+    return KiteTicker
+
+
+# Columns passed to on_tick_batch callbacks, in block order
+TICK_BATCH_COLUMNS = [
+    "instrument_token",
+    "last_price",
+    "best_bid_px",
+    "best_bid_sz",
+    "best_ask_px",
+    "best_ask_sz",
+]
+
+_NO_LEVEL: Dict[str, Any] = {}
+
+
+def _tick_batch_row(tick: Dict[str, Any]) -> tuple:
+    """Top-of-book fields of a tick in TICK_BATCH_COLUMNS order."""
+    depth = tick.get("depth")
+    if depth:
+        buy = depth.get("buy")
+        sell = depth.get("sell")
+        bid = buy[0] if buy else _NO_LEVEL
+        ask = sell[0] if sell else _NO_LEVEL
+    else:
+        bid = ask = _NO_LEVEL
+    return (
+        tick.get("instrument_token"),
+        tick.get("last_price"),
+        bid.get("price"),
+        bid.get("quantity"),
+        ask.get("price"),
+        ask.get("quantity"),
+    )
+
+
+def tick_batch(ticks: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert a batch of ticks to top-of-book columns in one pass.
+
+    Args:
+        ticks: Raw ticks from KiteTicker.
+
+    Returns:
+        Dict mapping each TICK_BATCH_COLUMNS name to a float64 array (views
+        into one block). Missing values and empty (zero-price) levels are
+        NaN, as in SnapshotBuilder.build_snapshot_columns.
+    """
+    block = np.array(
+        [_tick_batch_row(tick) for tick in ticks], dtype=np.float64
+    ).reshape(len(ticks), len(TICK_BATCH_COLUMNS))
+    for px, sz in ((2, 3), (4, 5)):
+        empty = block[:, px] == 0
+        block[empty, px] = np.nan
+        block[empty, sz] = np.nan
+    return {col: block[:, i] for i, col in enumerate(TICK_BATCH_COLUMNS)}
+
+
+def _slot_getter(slots: List[int]) -> Callable[[Sequence[Any]], Sequence[Any]]:
+    """Like operator.itemgetter(*slots), but always returning a tuple."""
+    if len(slots) == 1:
+        slot = slots[0]
+        return lambda seq: (seq[slot],)
+    if not slots:
+        return lambda seq: ()
+    return operator.itemgetter(*slots)
+
+
+class _TickSlotView(collections.abc.Mapping):
+    """Read-only live token -> latest tick mapping over a TickerStream's slots."""
+
+    __slots__ = ("_stream", "_order_tokens", "_order_version", "_order_getter")
+
+    def __init__(self, stream: "TickerStream"):
+        self._stream = stream
+        # Slot order cached by ticks_in_order
+        self._order_tokens: Optional[List[int]] = None
+        self._order_version = -1
+        self._order_getter: Callable[[Sequence[Any]], Sequence[Any]] = _slot_getter([])
+
+    def ticks_in_order(self, tokens: List[int]) -> Sequence[Optional[Dict[str, Any]]]:
+        """
+        Latest tick, or None, for each token in the given order.
+
+        The slots for a tokens list are resolved once and reused while the
+        same list object is passed and the stream's token layout is
+        unchanged, so snapshots of a fixed universe do no per-token lookups.
+        """
+        stream = self._stream
+        if tokens is not self._order_tokens or stream._layout_version != self._order_version:
+            version = stream._layout_version
+            # Unknown tokens read the None appended below
+            token_slot = stream._token_slot
+            self._order_getter = _slot_getter([token_slot.get(token, -1) for token in tokens])
+            self._order_tokens = tokens
+            self._order_version = version
+        return self._order_getter(stream._tick_slots + [None])
+
+    def __getitem__(self, token: int) -> Dict[str, Any]:
+        stream = self._stream
+        tick = stream._tick_slots[stream._token_slot[token]]
+        if tick is None:
+            raise KeyError(token)
+        return tick
+
+    def get(self, token: int, default: Any = None) -> Any:
+        stream = self._stream
+        slot = stream._token_slot.get(token)
+        if slot is None:
+            return default
+        tick = stream._tick_slots[slot]
+        return default if tick is None else tick
+
+    def __iter__(self):
+        stream = self._stream
+        for token, tick in zip(stream._slot_tokens, stream._tick_slots):
+            if token is not None and tick is not None:
+                yield token
+
+    def __len__(self) -> int:
+        slots = self._stream._tick_slots
+        return len(slots) - slots.count(None)
+
+
+class _MergedTickView(collections.abc.Mapping):
+    """
+    Read-only live token -> latest tick mapping over a MultiTickerStream.
+
+    Each stream keeps its own tick store; lookups are routed to the owning
+    stream through _token_to_stream, so nothing is merged per tick.
+    """
+
+    __slots__ = ("_multi",)
+
+    def __init__(self, multi: "MultiTickerStream"):
+        self._multi = multi
+
+    def __getitem__(self, token: int) -> Dict[str, Any]:
+        return self._multi._token_to_stream[token]._latest_ticks_view[token]
+
+    def get(self, token: int, default: Any = None) -> Any:
+        stream = self._multi._token_to_stream.get(token)
+        if stream is None:
+            return default
+        return stream._latest_ticks_view.get(token, default)
+
+    def __iter__(self):
+        for stream in list(self._multi._streams):
+            yield from stream._latest_ticks_view
+
+    def __len__(self) -> int:
+        return sum(len(stream._latest_ticks_view) for stream in list(self._multi._streams))
+
 
 class TickerStream:
     """Manages WebSocket streaming of tick data from Kite Connect."""
 
     MAX_TOKENS_PER_CONNECTION = 3000
+    # unsubscribe compacts the slots once holes exceed this share of live tokens
+    COMPACT_HOLE_RATIO = 0.25
 
     def __init__(
         self,
@@ -30,6 +280,7 @@ class TickerStream:
         reconnect: bool = True,
         reconnect_max_tries: int = 50,
         reconnect_max_delay: int = 30,
+        publish_interval: float = 0.1,
     ):
         """
         Initialize TickerStream.
@@ -40,35 +291,61 @@ class TickerStream:
             reconnect: Enable auto-reconnect.
             reconnect_max_tries: Maximum reconnection attempts.
             reconnect_max_delay: Maximum delay between reconnects in seconds.
+            publish_interval: Seconds for which get_all_latest_ticks may keep
+                returning the same snapshot while newer ticks arrive.
         """
         self.api_key = api_key
         self.access_token = access_token
         self.reconnect = reconnect
         self.reconnect_max_tries = reconnect_max_tries
         self.reconnect_max_delay = reconnect_max_delay
+        self.publish_interval = publish_interval
 
         self._ticker: Optional[KiteTicker] = None
         self._subscribed_tokens: List[int] = []
-        self._latest_ticks: Dict[int, Dict[str, Any]] = {}
-        self._tick_lock = threading.RLock()
+        # Latest tick per subscribed token, stored by slot: token -> slot is
+        # fixed by set_tokens (subscribe appends, unsubscribe leaves a hole
+        # until holes pass COMPACT_HOLE_RATIO), so a tick is one list store
+        # with no hashing or resizing. Slots are written only by the ticker
+        # thread; single stores and list copies are atomic under the GIL, so
+        # readers take no lock.
+        self._token_slot: Dict[int, int] = {}
+        self._slot_tokens: List[Optional[int]] = []
+        self._tick_slots: List[Optional[Dict[str, Any]]] = []
+        # Bumped whenever tokens gain or lose slots
+        self._layout_version = 0
+        self._latest_ticks_view = _TickSlotView(self)
+        # Read-only copy of the latest ticks for get_all_latest_ticks, built
+        # on read and replaced whole (one reference swap) at most every
+        # publish_interval; _published_ns is the monotonic time it covers,
+        # None once stale. The ticker thread never copies the store.
+        self._published: Mapping[int, Dict[str, Any]] = MappingProxyType({})
+        self._published_ns: Optional[int] = None
+        self._publish_interval_ns = int(publish_interval * 1e9)
+        # Set on the first tick after each has_new_ticks() check
+        self._dirty = threading.Event()
+        # Tokens ticked since the last pop_dirty(); the ticker thread only
+        # adds, after storing the tick (see pop_dirty)
+        self._dirty_tokens: Set[int] = set()
         self._running = False
 
         # Callbacks
         self._on_tick_callback: Optional[Callable[[List[Dict]], None]] = None
+        self._on_tick_batch_callback: Optional[Callable[[Dict[str, np.ndarray]], None]] = None
         self._on_connect_callback: Optional[Callable[[], None]] = None
         self._on_close_callback: Optional[Callable[[int, str], None]] = None
 
-        # Stats
-        self._stats = {
-            "ticks_received": 0,
-            "reconnect_count": 0,
-            "errors": 0,
-            "last_tick_time": None,
-        }
+        # Stats, as plain counters: each is bumped by one thread and a bare
+        # attribute += is cheaper than a dict key update
+        self._ticks_received = 0
+        self._reconnect_count = 0
+        self._errors = 0
+        # time.monotonic_ns() of the last tick batch; get_stats converts it
+        self._last_tick_ns: Optional[int] = None
 
     def _create_ticker(self) -> KiteTicker:
         """Create and configure a new KiteTicker instance."""
-        ticker = KiteTicker(
+        ticker = _ticker_class()(
             api_key=self.api_key,
             access_token=self.access_token,
             reconnect=self.reconnect,
@@ -90,14 +367,25 @@ class TickerStream:
         if not ticks:
             return
 
-        with self._tick_lock:
-            for tick in ticks:
-                token = tick.get("instrument_token")
-                if token is not None:
-                    self._latest_ticks[token] = tick
-                    self._stats["ticks_received"] += 1
-
-            self._stats["last_tick_time"] = datetime.now()
+        # Slots before the token map: _set_slots swaps them in the other
+        # order, so a slot index is never applied to a newer slot list
+        tick_slots = self._tick_slots
+        token_slot = self._token_slot
+        mark_dirty = self._dirty_tokens.add
+        received = 0
+        for tick in ticks:
+            token = tick.get("instrument_token")
+            slot = token_slot.get(token)
+            if slot is not None:
+                tick_slots[slot] = tick
+                mark_dirty(token)
+                received += 1
+
+        self._ticks_received += received
+        self._last_tick_ns = time.monotonic_ns()
+
+        if not self._dirty.is_set():
+            self._dirty.set()
 
         # Call user callback if registered
         if self._on_tick_callback:
@@ -106,6 +394,12 @@ class TickerStream:
             except Exception as e:
                 logger.error(f"Error in tick callback: {e}")
 
+        if self._on_tick_batch_callback:
+            try:
+                self._on_tick_batch_callback(tick_batch(ticks))
+            except Exception as e:
+                logger.error(f"Error in tick batch callback: {e}")
+
     def _handle_connect(self, ws: Any, response: Any) -> None:
         """Handle WebSocket connection."""
         logger.info("WebSocket connected")
@@ -152,12 +446,12 @@ class TickerStream:
     def _handle_error(self, ws: Any, code: int, reason: str) -> None:
         """Handle WebSocket error."""
         logger.error(f"WebSocket error: code={code}, reason={reason}")
-        self._stats["errors"] += 1
+        self._errors += 1
 
     def _handle_reconnect(self, ws: Any, attempts_count: int) -> None:
         """Handle reconnection attempt."""
         logger.info(f"WebSocket reconnecting, attempt {attempts_count}")
-        self._stats["reconnect_count"] += 1
+        self._reconnect_count += 1
 
     def _handle_noreconnect(self, ws: Any) -> None:
         """Handle max reconnection attempts reached."""
@@ -171,13 +465,134 @@ class TickerStream:
         Args:
             tokens: List of instrument tokens.
         """
-        self._subscribed_tokens = tokens
+        # Own copy: subscribe/unsubscribe edit it in place
+        self._subscribed_tokens = list(tokens)
+        self._set_slots(list(tokens), [None] * len(tokens))
+        self._dirty_tokens.clear()
+        self._published = MappingProxyType({})
+        self._published_ns = None
         logger.info(f"Set {len(tokens)} tokens for subscription")
 
+    def _set_slots(
+        self,
+        slot_tokens: List[int],
+        tick_slots: List[Optional[Dict[str, Any]]],
+    ) -> None:
+        """
+        Replace the slot lists with hole-free ones, one slot per token.
+
+        The token map is swapped before the tick slots: _handle_ticks reads
+        them in the other order, so a batch in flight at worst writes into
+        the old lists and that tick is missed until the token's next one.
+        """
+        self._token_slot = {token: slot for slot, token in enumerate(slot_tokens)}
+        self._slot_tokens = slot_tokens
+        self._tick_slots = tick_slots
+        self._layout_version += 1
+
+    def _compact_slots(self) -> None:
+        """Drop the holes left by unsubscribe, keeping each live token's tick."""
+        live = [
+            (token, tick)
+            for token, tick in zip(self._slot_tokens, self._tick_slots)
+            if token is not None
+        ]
+        self._set_slots([token for token, _ in live], [tick for _, tick in live])
+
+    def _live_ticker(self) -> Optional[KiteTicker]:
+        """The ticker if it is connected, else None."""
+        ticker = self._ticker
+        if ticker is not None and ticker.is_connected():
+            return ticker
+        return None
+
+    def subscribe(self, tokens: List[int]) -> List[int]:
+        """
+        Add tokens to the subscription, in FULL mode.
+
+        Only the given tokens are sent to the server; existing subscriptions
+        are left alone. If not connected yet, they are subscribed on connect.
+        Tokens beyond MAX_TOKENS_PER_CONNECTION are not subscribed, so
+        unsubscribe outgoing tokens first.
+
+        Args:
+            tokens: Instrument tokens to add.
+
+        Returns:
+            The given tokens that are subscribed after the call.
+        """
+        current = set(self._subscribed_tokens)
+        new_tokens = [t for t in tokens if t not in current]
+        room = self.MAX_TOKENS_PER_CONNECTION - len(self._subscribed_tokens)
+        if len(new_tokens) > room:
+            logger.warning(
+                f"Token limit ({self.MAX_TOKENS_PER_CONNECTION}) reached, "
+                f"dropping {len(new_tokens) - room} new tokens"
+            )
+            new_tokens = new_tokens[:max(room, 0)]
+        accepted = [t for t in tokens if t in current] + new_tokens
+        if not new_tokens:
+            return accepted
+
+        self._subscribed_tokens.extend(new_tokens)
+        # Grow the slot lists before publishing the new slots to the ticker thread
+        first_slot = len(self._tick_slots)
+        self._slot_tokens.extend(new_tokens)
+        self._tick_slots.extend([None] * len(new_tokens))
+        self._token_slot.update(
+            {token: first_slot + i for i, token in enumerate(new_tokens)}
+        )
+        self._layout_version += 1
+        ticker = self._live_ticker()
+        if ticker:
+            ticker.subscribe(new_tokens)
+            ticker.set_mode(ticker.MODE_FULL, new_tokens)
+        logger.info(f"Subscribed to {len(new_tokens)} additional tokens")
+        return accepted
+
+    def unsubscribe(self, tokens: List[int]) -> None:
+        """
+        Remove tokens from the subscription and drop their latest ticks.
+
+        Args:
+            tokens: Instrument tokens to remove.
+        """
+        removed = set(tokens).intersection(self._subscribed_tokens)
+        if not removed:
+            return
+
+        self._subscribed_tokens = [t for t in self._subscribed_tokens if t not in removed]
+        ticker = self._live_ticker()
+        if ticker:
+            ticker.unsubscribe(list(removed))
+        for token in removed:
+            slot = self._token_slot.pop(token, None)
+            if slot is not None:
+                self._slot_tokens[slot] = None
+                self._tick_slots[slot] = None
+        # Holes cost every snapshot, so a universe that keeps shifting must
+        # not grow the slot lists without bound
+        holes = len(self._slot_tokens) - len(self._token_slot)
+        if holes > len(self._token_slot) * self.COMPACT_HOLE_RATIO:
+            self._compact_slots()
+        self._dirty_tokens.difference_update(removed)
+        self._published_ns = None
+        logger.info(f"Unsubscribed from {len(removed)} tokens")
+
     def on_tick(self, callback: Callable[[List[Dict]], None]) -> None:
         """Register callback for tick events."""
         self._on_tick_callback = callback
 
+    def on_tick_batch(self, callback: Callable[[Dict[str, np.ndarray]], None]) -> None:
+        """
+        Register callback for tick events as top-of-book columns.
+
+        The callback receives tick_batch(ticks) for each batch, built on the
+        ticker thread in a single pass, so vectorised consumers need not
+        iterate the tick dictionaries again.
+        """
+        self._on_tick_batch_callback = callback
+
     def on_connect(self, callback: Callable[[], None]) -> None:
         """Register callback for connect events."""
         self._on_connect_callback = callback
@@ -232,27 +647,92 @@ class TickerStream:
         Returns:
             Latest tick data or None.
         """
-        with self._tick_lock:
-            return self._latest_ticks.get(token)
-
-    def get_all_latest_ticks(self) -> Dict[int, Dict[str, Any]]:
+        return self._latest_ticks_view.get(token)
+
+    def _publish(self, as_of_ns: int) -> None:
+        """Replace the published snapshot with a copy of the current ticks."""
+        self._published = MappingProxyType({
+            token: tick
+            for token, tick in zip(self._slot_tokens, self._tick_slots)
+            if token is not None and tick is not None
+        })
+        self._published_ns = as_of_ns
+
+    def get_all_latest_ticks(self) -> Mapping[int, Dict[str, Any]]:
         """
         Get all latest ticks.
 
+        Returns the published read-only snapshot, republished here only
+        when it misses ticks and is older than publish_interval, so repeated
+        reads within that interval share one copy.
+
         Returns:
-            Copy of latest ticks dictionary.
+            Read-only mapping of token -> latest tick.
+        """
+        last_tick_ns = self._last_tick_ns
+        published_ns = self._published_ns
+        if last_tick_ns is not None and (
+            published_ns is None
+            or (
+                last_tick_ns > published_ns
+                and time.monotonic_ns() - published_ns > self._publish_interval_ns
+            )
+        ):
+            self._publish(last_tick_ns)
+        return self._published
+
+    def get_latest_ticks_view(self) -> Mapping[int, Dict[str, Any]]:
+        """
+        Get a read-only live view of the latest ticks, without copying.
+
+        The view reflects ticks as they arrive, so use it for per-token
+        lookups; iterate over get_all_latest_ticks() instead.
+        """
+        return self._latest_ticks_view
+
+    def has_new_ticks(self) -> bool:
+        """Whether any tick arrived since the previous call."""
+        if not self._dirty.is_set():
+            return False
+        self._dirty.clear()
+        return True
+
+    def pop_dirty(self) -> Set[int]:
+        """
+        Return the tokens ticked since the previous call, and reset them.
+
+        Copy and difference_update are each atomic under the GIL. A token
+        re-marked between the two is dropped from the set, but its tick was
+        stored before the mark, so a snapshot built after this call already
+        reads it.
         """
-        with self._tick_lock:
-            return dict(self._latest_ticks)
+        dirty = self._dirty_tokens.copy()
+        self._dirty_tokens.difference_update(dirty)
+        return dirty
+
+    def _last_tick_time(self) -> Optional[datetime]:
+        """Wall-clock time of the last tick batch, or None if none arrived yet."""
+        last_tick_ns = self._last_tick_ns
+        if last_tick_ns is None:
+            return None
+        age = (time.monotonic_ns() - last_tick_ns) / 1e9
+        return datetime.fromtimestamp(time.time() - age)
 
     def get_stats(self) -> Dict[str, Any]:
         """Get streaming statistics."""
-        return dict(self._stats)
+        return {
+            "ticks_received": self._ticks_received,
+            "reconnect_count": self._reconnect_count,
+            "errors": self._errors,
+            "last_tick_time": self._last_tick_time(),
+        }
 
     def clear_ticks(self) -> None:
         """Clear the latest ticks cache."""
-        with self._tick_lock:
-            self._latest_ticks.clear()
+        self._tick_slots[:] = [None] * len(self._tick_slots)
+        self._dirty_tokens.clear()
+        self._published = MappingProxyType({})
+        self._published_ns = None
 
 
 class MultiTickerStream:
@@ -271,6 +751,7 @@ class MultiTickerStream:
         reconnect: bool = True,
         reconnect_max_tries: int = 50,
         reconnect_max_delay: int = 30,
+        publish_interval: float = 0.1,
     ):
         """Initialize MultiTickerStream."""
         self.api_key = api_key
@@ -278,21 +759,43 @@ class MultiTickerStream:
         self.reconnect = reconnect
         self.reconnect_max_tries = reconnect_max_tries
         self.reconnect_max_delay = reconnect_max_delay
+        self.publish_interval = publish_interval
 
         self._streams: List[TickerStream] = []
         self._token_to_stream: Dict[int, TickerStream] = {}
-        self._combined_ticks: Dict[int, Dict[str, Any]] = {}
-        self._tick_lock = threading.RLock()
+        # Ticks stay partitioned in each stream's own store, written only by
+        # that stream's thread; reads are routed or merged across streams
+        self._latest_ticks_view = _MergedTickView(self)
+        # Set on the first tick after each has_new_ticks() check
+        self._dirty = threading.Event()
+        # Streams added by subscribe are started only while this is set
+        self._running = False
 
         self._on_tick_callback: Optional[Callable[[List[Dict]], None]] = None
+        self._on_tick_batch_callback: Optional[Callable[[Dict[str, np.ndarray]], None]] = None
+
+    def _add_stream(self, tokens: List[int]) -> TickerStream:
+        """Create a stream for the given tokens and route them to it."""
+        stream = TickerStream(
+            api_key=self.api_key,
+            access_token=self.access_token,
+            reconnect=self.reconnect,
+            reconnect_max_tries=self.reconnect_max_tries,
+            reconnect_max_delay=self.reconnect_max_delay,
+            publish_interval=self.publish_interval,
+        )
+        stream.set_tokens(tokens)
+        stream.on_tick(self._handle_combined_ticks)
+        self._streams.append(stream)
+
+        for token in tokens:
+            self._token_to_stream[token] = stream
+        return stream
 
     def _handle_combined_ticks(self, ticks: List[Dict]) -> None:
-        """Handle ticks from any stream."""
-        with self._tick_lock:
-            for tick in ticks:
-                token = tick.get("instrument_token")
-                if token is not None:
-                    self._combined_ticks[token] = tick
+        """Handle ticks from any stream, after it has stored them."""
+        if not self._dirty.is_set():
+            self._dirty.set()
 
         if self._on_tick_callback:
             try:
@@ -300,6 +803,12 @@ class MultiTickerStream:
             except Exception as e:
                 logger.error(f"Error in combined tick callback: {e}")
 
+        if self._on_tick_batch_callback:
+            try:
+                self._on_tick_batch_callback(tick_batch(ticks))
+            except Exception as e:
+                logger.error(f"Error in combined tick batch callback: {e}")
+
     def set_tokens(self, tokens: List[int]) -> None:
         """
         Set tokens and distribute across connections.
@@ -329,46 +838,111 @@ class MultiTickerStream:
         self._token_to_stream.clear()
 
         for chunk in chunks:
-            stream = TickerStream(
-                api_key=self.api_key,
-                access_token=self.access_token,
-                reconnect=self.reconnect,
-                reconnect_max_tries=self.reconnect_max_tries,
-                reconnect_max_delay=self.reconnect_max_delay,
-            )
-            stream.set_tokens(chunk)
-            stream.on_tick(self._handle_combined_ticks)
-            self._streams.append(stream)
+            self._add_stream(chunk)
+
+        logger.info(f"Configured {len(self._streams)} streams for {len(tokens)} tokens")
+
+    def subscribe(self, tokens: List[int]) -> List[int]:
+        """
+        Add tokens to the subscription, filling streams that have room.
 
-            for token in chunk:
+        Tokens that fit in no existing stream get a new one, up to
+        MAX_CONNECTIONS; it is started at once if the streams are running.
+
+        Args:
+            tokens: Instrument tokens to add.
+
+        Returns:
+            The given tokens that are subscribed after the call.
+        """
+        max_per_stream = TickerStream.MAX_TOKENS_PER_CONNECTION
+        pending = [t for t in tokens if t not in self._token_to_stream]
+        for stream in self._streams:
+            if not pending:
+                break
+            room = max_per_stream - len(stream._subscribed_tokens)
+            if room <= 0:
+                continue
+            chunk, pending = pending[:room], pending[room:]
+            for token in stream.subscribe(chunk):
                 self._token_to_stream[token] = stream
 
-        logger.info(f"Configured {len(self._streams)} streams for {len(tokens)} tokens")
+        while pending and len(self._streams) < self.MAX_CONNECTIONS:
+            chunk, pending = pending[:max_per_stream], pending[max_per_stream:]
+            stream = self._add_stream(chunk)
+            logger.info(f"Added stream {len(self._streams)} for {len(chunk)} new tokens")
+            if self._running:
+                stream.start(threaded=True)
+
+        if pending:
+            logger.warning(f"No stream capacity left, dropping {len(pending)} new tokens")
+        return [t for t in tokens if t in self._token_to_stream]
+
+    def unsubscribe(self, tokens: List[int]) -> None:
+        """
+        Remove tokens from whichever streams hold them.
+
+        Args:
+            tokens: Instrument tokens to remove.
+        """
+        by_stream: Dict[TickerStream, List[int]] = {}
+        for token in tokens:
+            stream = self._token_to_stream.pop(token, None)
+            if stream is not None:
+                by_stream.setdefault(stream, []).append(token)
+
+        for stream, stream_tokens in by_stream.items():
+            stream.unsubscribe(stream_tokens)
 
     def on_tick(self, callback: Callable[[List[Dict]], None]) -> None:
         """Register callback for tick events."""
         self._on_tick_callback = callback
 
+    def on_tick_batch(self, callback: Callable[[Dict[str, np.ndarray]], None]) -> None:
+        """Register callback for tick events as top-of-book columns (see tick_batch)."""
+        self._on_tick_batch_callback = callback
+
     def start(self) -> None:
         """Start all WebSocket connections."""
+        self._running = True
         for i, stream in enumerate(self._streams):
             logger.info(f"Starting stream {i + 1}/{len(self._streams)}")
             stream.start(threaded=True)
 
     def stop(self) -> None:
         """Stop all WebSocket connections."""
+        self._running = False
         for stream in self._streams:
             stream.stop()
 
     def get_latest_tick(self, token: int) -> Optional[Dict[str, Any]]:
         """Get the latest tick for a token."""
-        with self._tick_lock:
-            return self._combined_ticks.get(token)
+        return self._latest_ticks_view.get(token)
 
     def get_all_latest_ticks(self) -> Dict[int, Dict[str, Any]]:
-        """Get all latest ticks."""
-        with self._tick_lock:
-            return dict(self._combined_ticks)
+        """Get all latest ticks, merged from every stream's published snapshot."""
+        merged: Dict[int, Dict[str, Any]] = {}
+        for stream in self._streams:
+            merged.update(stream.get_all_latest_ticks())
+        return merged
+
+    def get_latest_ticks_view(self) -> Mapping[int, Dict[str, Any]]:
+        """Get a read-only live view of the latest ticks, without copying."""
+        return self._latest_ticks_view
+
+    def has_new_ticks(self) -> bool:
+        """Whether any tick arrived since the previous call."""
+        if not self._dirty.is_set():
+            return False
+        self._dirty.clear()
+        return True
+
+    def pop_dirty(self) -> Set[int]:
+        """Return the tokens ticked on any stream since the previous call, and reset them."""
+        dirty: Set[int] = set()
+        for stream in self._streams:
+            dirty |= stream.pop_dirty()
+        return dirty
 
     def get_stats(self) -> Dict[str, Any]:
         """Get combined stats from all streams."""
@@ -0,0 +1,76 @@
+"""
+Tests for OptionChainStreamer.refresh_universe in engines.zerodha.run_option_chain.
+
+Run with: python -m unittest discover tests
+"""
+
+import logging
+import unittest
+from pathlib import Path
+from types import MappingProxyType
+from unittest import mock
+
+from engines.zerodha.run_option_chain import OptionChainStreamer
+from engines.zerodha.ticker_stream import TickerStream
+
+
+class _BandUniverse:
+    """Stand-in OptionUniverse whose tokens are a contiguous strike band."""
+
+    def __init__(self, first: int, count: int):
+        self.set_band(first, count)
+
+    def set_band(self, first: int, count: int) -> None:
+        self._tokens = list(range(first, first + count))
+        self._view = MappingProxyType(dict.fromkeys(self._tokens))
+
+    def refresh_universe(self, spot_prices=None):
+        return self._view
+
+    def get_tokens(self):
+        return self._tokens
+
+    def summary_counts_only(self):
+        return {}
+
+
+class RefreshUniverseTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+        self.universe = _BandUniverse(0, 2900)
+        self.streamer = OptionChainStreamer({}, Path("."))
+        self.streamer.universe = self.universe
+        self.streamer.builder = mock.Mock()
+        self.streamer.ticker = TickerStream("key", "token")
+        self.streamer.ticker.set_tokens(self.universe.get_tokens())
+        self.streamer._subscribed_tokens = set(self.universe.get_tokens())
+        self.streamer._universe_snapshot = self.universe.refresh_universe()
+
+    def test_band_shift_near_limit_subscribes_every_new_token(self):
+        self.universe.set_band(200, 2900)
+        self.streamer.refresh_universe()
+
+        expected = set(range(200, 3100))
+        self.assertEqual(set(self.streamer.ticker._subscribed_tokens), expected)
+        self.assertEqual(self.streamer._subscribed_tokens, expected)
+        self.streamer.builder.set_universe.assert_called_once()
+
+    def test_tokens_over_limit_are_not_recorded_and_retried(self):
+        ticker = self.streamer.ticker
+        self.universe.set_band(0, 3100)
+        self.streamer.refresh_universe()
+        self.assertEqual(len(self.streamer._subscribed_tokens), 3000)
+        self.assertEqual(self.streamer._subscribed_tokens, set(ticker._subscribed_tokens))
+
+        # Unchanged universe: the dropped tokens are retried once there is room
+        ticker.MAX_TOKENS_PER_CONNECTION = 3100
+        self.streamer.refresh_universe()
+        self.assertEqual(self.streamer._subscribed_tokens, set(range(3100)))
+        self.assertEqual(set(ticker._subscribed_tokens), set(range(3100)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Tests for the fast full-mode tick parser in engines.zerodha.ticker_stream.
+
+Run with: python -m unittest discover tests
+"""
+
+import logging
+import random
+import struct
+import unittest
+from unittest import mock
+
+from kiteconnect import KiteTicker
+
+from engines.zerodha import ticker_stream
+from engines.zerodha.ticker_stream import MultiTickerStream, TickerStream, _FastKiteTicker
+
+# Instrument tokens in each segment with its own price divisor
+_TOKENS = [
+    12345 << 8 | 2,   # nfo: / 100
+    999 << 8 | 3,     # cds: / 10000000
+    77 << 8 | 9,      # indices: not tradable
+    5 << 8 | 12,      # nco: / 10000
+]
+
+
+def _full_packet(rng: random.Random) -> bytes:
+    """A random 184-byte full-mode quote packet."""
+    header = (
+        [rng.choice(_TOKENS)]
+        + [rng.randint(0, 2**31) for _ in range(9)]
+        + [rng.choice([0, rng.randint(1, 2**31)])]                 # close, incl. 0
+        + [rng.choice([0, 1760000000, 2**32 - 1])]                 # last trade time
+        + [rng.randint(0, 99999) for _ in range(3)]                # oi fields
+        + [rng.choice([1760000000, 2**32 - 1])]                    # exchange timestamp
+    )
+    packet = struct.pack(">16I", *header)
+    for _ in range(10):
+        packet += struct.pack(
+            ">IIH2x", rng.randint(0, 5000), rng.randint(0, 90000), rng.randint(0, 60)
+        )
+    return packet
+
+
+def _other_packet(rng: random.Random, length: int) -> bytes:
+    """A random LTP / index / quote packet of the given length."""
+    token = struct.pack(">I", rng.choice(_TOKENS))
+    return token + bytes(rng.getrandbits(8) for _ in range(length - 4))
+
+
+def _frame(packets) -> bytes:
+    """Frame packets as one WebSocket binary message."""
+    return struct.pack(">H", len(packets)) + b"".join(
+        struct.pack(">H", len(p)) + p for p in packets
+    )
+
+
+class FastKiteTickerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.fast = _FastKiteTicker("key", "token")
+        self.stock = KiteTicker("key", "token")
+
+    def assertSameTicks(self, payload: bytes):
+        fast = self.fast._parse_binary(payload)
+        stock = self.stock._parse_binary(payload)
+        self.assertEqual(fast, stock)
+        # Same key order too, as consumers may iterate the dicts
+        self.assertEqual([list(t) for t in fast], [list(t) for t in stock])
+
+    def test_full_mode_packets_match_stock_parser(self):
+        self.assertSameTicks(_frame([_full_packet(self.rng) for _ in range(200)]))
+
+    def test_mixed_packets_match_stock_parser(self):
+        packets = [
+            _full_packet(self.rng) if length == 184 else _other_packet(self.rng, length)
+            for length in [self.rng.choice([8, 28, 32, 44, 184]) for _ in range(200)]
+        ]
+        self.assertSameTicks(_frame(packets))
+
+    def test_heartbeat_is_empty(self):
+        self.assertEqual(self.fast._parse_binary(b"\x00"), [])
+
+    def test_unverified_version_uses_stock_parser(self):
+        with mock.patch.object(ticker_stream, "KITECONNECT_VERSION", "0.0.0"):
+            self.assertIs(ticker_stream._ticker_class(), KiteTicker)
+        with mock.patch.object(
+            ticker_stream, "KITECONNECT_VERSION",
+            next(iter(ticker_stream.VERIFIED_KITECONNECT_VERSIONS)),
+        ):
+            self.assertIs(ticker_stream._ticker_class(), _FastKiteTicker)
+
+
+class SubscribeTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_subscribe_returns_accepted_tokens(self):
+        stream = TickerStream("key", "token")
+        stream.set_tokens(list(range(2990)))
+        accepted = stream.subscribe([5] + list(range(2990, 3010)))
+        self.assertEqual(accepted, [5] + list(range(2990, 3000)))
+        self.assertEqual(len(stream._subscribed_tokens), 3000)
+
+    def test_multi_stream_adds_a_stream_when_full(self):
+        multi = MultiTickerStream("key", "token")
+        multi.set_tokens(list(range(3500)))
+        self.assertEqual(len(multi._streams), 2)
+
+        new_tokens = list(range(3500, 6600))
+        accepted = multi.subscribe(new_tokens)
+        self.assertEqual(accepted, new_tokens)
+        self.assertEqual(len(multi._streams), 3)
+        self.assertEqual(len(multi._token_to_stream), 6600)
+
+    def test_multi_stream_returns_only_what_fits(self):
+        multi = MultiTickerStream("key", "token")
+        multi.set_tokens(list(range(8990)))
+        accepted = multi.subscribe(list(range(8990, 9010)))
+        self.assertEqual(accepted, list(range(8990, 9000)))
+
+    def test_band_shifts_do_not_grow_slots(self):
+        stream = TickerStream("key", "token")
+        band = list(range(2900))
+        stream.set_tokens(band)
+        stream._handle_ticks(None, [{"instrument_token": t, "last_price": t} for t in band])
+
+        # Spot moving back and forth: the same 200 contracts leave and return
+        for _ in range(50):
+            stream.unsubscribe(band[:200])
+            stream.subscribe(band[:200])
+            stream.unsubscribe(band[:200])
+            stream.subscribe(list(range(2900, 3100)))
+            stream.unsubscribe(list(range(2900, 3100)))
+            stream.subscribe(band[:200])
+
+        live = len(stream._token_slot)
+        self.assertEqual(live, 2900)
+        self.assertLessEqual(len(stream._tick_slots), live * (1 + stream.COMPACT_HOLE_RATIO))
+        view = stream.get_latest_ticks_view()
+        self.assertEqual(len(view), 2700)
+        self.assertEqual(view[2899]["last_price"], 2899)
+        ticks = view.ticks_in_order(band)
+        self.assertEqual([t and t["last_price"] for t in ticks], [None] * 200 + band[200:])
+
+
+if __name__ == "__main__":
+    unittest.main()